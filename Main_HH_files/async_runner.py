@@ -3,49 +3,153 @@ import threading
 
 
 class AsyncParserRunner:
-    def __init__(self, parser_instance, update_callback=None, completion_callback=None):
+    """
+    Долгоживущий сервис запуска парсеров: один поток с event loop и один тёплый браузер
+    на всё время работы приложения. Задания из GUI выполняются в этом loop
+    и переиспользуют уже запущенный браузер.
+    """
+
+    def __init__(self, parser_instance=None, update_callback=None, completion_callback=None):
         self.parser_instance = parser_instance
         self.update_callback = update_callback
         self.completion_callback = completion_callback
         self.loop = None
-        self.task = None
+        self.task = None  # concurrent.futures.Future текущего задания
+        self._job = None  # Корутина текущего задания — по ней находится её asyncio-задача при отмене
+        self.browser_service = None
+        self._thread = None
+        self._ready = threading.Event()
 
     def start(self):
-        """Запуск парсинга в отдельном потоке с корректной обработкой asyncio"""
-        thread = threading.Thread(target=self._run_in_thread, daemon=True)
-        thread.start()
-        
-        return thread
+        """Запуск потока с event loop; если парсер передан в конструктор — сразу запускает и его"""
+        self._ensure_loop()
+        if self.parser_instance is not None and self.task is None:
+            self.submit(self.parser_instance, self.update_callback, self.completion_callback)
+        return self._thread
+
+    def _ensure_loop(self):
+        if self._thread is None:
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_in_thread, daemon=True)
+            self._thread.start()
+            self._ready.wait()
 
     def _run_in_thread(self):
-        """Запуск asyncio в отдельном потоке"""
+        """Event loop сервиса живёт, пока не вызван shutdown"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
         try:
-            # Создаем новый event loop для этого потока
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-
-            # Запускаем парсинг
-            self.loop.run_until_complete(self._parse())
-        except Exception as e:
-            if self.update_callback:
-                self.update_callback(f"Ошибка: {str(e)}")
+            self.loop.run_forever()
         finally:
-            if self.loop and not self.loop.is_closed():
-                self.loop.close()
+            try:
+                if self.browser_service is not None:
+                    self.loop.run_until_complete(self.browser_service.close())
+            except Exception:
+                pass
+            self.loop.close()
+
+    def _service(self):
+        """
+        BrowserService создаётся при первом обращении в потоке loop:
+        Playwright импортируется там, а не при открытии окна
+        """
+        if self.browser_service is None:
+            from Main_HH_files.browser_service import BrowserService
+
+            self.browser_service = BrowserService()
+        return self.browser_service
+
+    def warm_up(self, headless: bool = None):
+        """Запускает браузер в фоне, пока пользователь выбирает файл или вводит URL"""
+        self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._warm_up(headless), self.loop)
+        future.add_done_callback(self._on_warm_up_done)
+        return future
+
+    async def _warm_up(self, headless: bool = None):
+        await self._service().warm_up(headless)
+
+    def _on_warm_up_done(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None and self.update_callback:
+            self.update_callback(f"Не удалось заранее запустить браузер: {error}")
+
+    @property
+    def is_busy(self) -> bool:
+        """Задание ещё выполняется, в том числе его finally после отмены"""
+        return self.task is not None and not self.task.done()
 
-    async def _parse(self):
+    def cancel(self):
+        """
+        Отменяет текущее задание. Future задания завершается только после того, как парсер
+        выполнит свои finally (запись остатка, журнал, выгрузка), — до этого is_busy остаётся True.
+        """
+        if self.is_busy:
+            self.loop.call_soon_threadsafe(self._cancel_job)
+
+    def _cancel_job(self):
+        # Future из run_coroutine_threadsafe не отменяем напрямую: он сразу стал бы done,
+        # хотя задача в loop ещё работает. Отменяем саму задачу — future завершится вслед за ней
+        for task in asyncio.all_tasks(self.loop):
+            if task.get_coro() is self._job:
+                task.cancel()
+
+    def submit(self, parser_instance, update_callback=None, completion_callback=None):
+        """
+        Ставит парсер на выполнение в loop сервиса.
+        Return: concurrent.futures.Future задания
+        Raises: RuntimeError, если предыдущее задание ещё не завершилось
+        """
+        if self.is_busy:
+            raise RuntimeError("Предыдущее задание ещё выполняется")
+        self._ensure_loop()
+        self.parser_instance = parser_instance
+        self.update_callback = update_callback
+        self.completion_callback = completion_callback
+        self._job = self._parse(parser_instance, update_callback, completion_callback)
+        self.task = asyncio.run_coroutine_threadsafe(self._job, self.loop)
+        return self.task
+
+    async def _parse(self, parser_instance, update_callback=None, completion_callback=None):
         """Основная функция парсинга"""
         try:
-            if self.update_callback:
-                self.update_callback("Начало парсинга...")
+            if update_callback:
+                update_callback("Начало парсинга...")
 
-            await self.parser_instance.parse_main(update_callback=self.update_callback)
+            await parser_instance.parse_main(
+                update_callback=update_callback, browser_service=self._service()
+            )
 
-            if self.completion_callback:
-                self.completion_callback(flag=True)
+            if completion_callback:
+                completion_callback(flag=True)
         except Exception as e:
-            if self.update_callback:
-                self.update_callback(f"Ошибка при парсинге: {str(e)}")
-            if self.completion_callback:
-                self.completion_callback(flag=False)
+            if update_callback:
+                update_callback(f"Ошибка при парсинге: {str(e)}")
+            if completion_callback:
+                completion_callback(flag=False)
             raise
+
+    async def _stop(self):
+        """Даёт отменённому заданию выполнить свои finally и закрывает браузер"""
+        pending = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self.browser_service is not None:
+            await self.browser_service.close()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Останавливает текущее задание, закрывает браузер и event loop"""
+        if self.loop is None or self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result(timeout)
+        except Exception as e:
+            print(f"Ошибка при остановке браузера: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
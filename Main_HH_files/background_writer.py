@@ -0,0 +1,76 @@
+import queue
+import asyncio
+import threading
+
+
+class BackgroundWriter:
+    """
+    Отдельный поток записи результатов, питаемый ограниченной очередью.
+    Синхронная запись (pandas/openpyxl) уходит из event loop, и вкладки браузера
+    не простаивают, пока сохраняется файл.
+    """
+
+    _STOP = object()
+
+    def __init__(self, sink, max_queue: int = 100, name: str = "result-writer"):
+        """
+        Args:
+            sink: Синхронная функция, которая записывает один элемент очереди
+            max_queue: Размер очереди; при переполнении submit ждёт (backpressure)
+        """
+        self.sink = sink
+        self.name = name
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.errors = []
+        self._thread = None
+
+    def start(self):
+        """Запуск потока записи"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        """Цикл потока: пишем элементы по порядку до стоп-сигнала"""
+        while True:
+            item = self.queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                self.sink(item)
+            except Exception as e:
+                print(f"Ошибка записи результатов: {e}")
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()
+
+    async def submit(self, item):
+        """Ставит элемент в очередь записи, не блокируя event loop"""
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.to_thread(self.queue.put, item)
+
+    async def flush(self):
+        """Ждёт, пока всё поставленное в очередь будет записано"""
+        if self._thread is not None:
+            await asyncio.shield(asyncio.to_thread(self.queue.join))
+
+    def _close_sync(self):
+        self.queue.put(self._STOP)
+        self._thread.join()
+
+    async def close(self):
+        """Дописывает очередь и останавливает поток (в т.ч. при ошибке или отмене задачи)"""
+        if self._thread is None:
+            return
+        # shield: при повторной отмене поток всё равно допишет очередь
+        await asyncio.shield(asyncio.to_thread(self._close_sync))
+        self._thread = None
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
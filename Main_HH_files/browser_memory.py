@@ -0,0 +1,106 @@
+import os
+import asyncio
+
+try:
+    import psutil  # Необязательная зависимость: без неё RSS читается из /proc (Linux)
+except ImportError:
+    psutil = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def format_mb(value) -> str:
+    return "н/д" if value is None else f"{value / 1_048_576:.0f} МБ"
+
+
+def process_rss(pid: int):
+    """Резидентная память процесса в байтах; None, если узнать нельзя"""
+    try:
+        if psutil is not None:
+            return psutil.Process(pid).memory_info().rss
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except Exception:
+        return None
+
+
+async def browser_process_ids(browser) -> list[int]:
+    """PID всех процессов Chromium (браузер, рендереры, GPU) через CDP"""
+    cdp = await browser.new_browser_cdp_session()
+    try:
+        info = await cdp.send("SystemInfo.getProcessInfo")
+    finally:
+        await cdp.detach()
+    return [process["id"] for process in info.get("processInfo", [])]
+
+
+async def browser_rss(browser):
+    """Суммарная RSS всех процессов браузера в байтах; None, если не удалось измерить"""
+    try:
+        pids = await browser_process_ids(browser)
+    except Exception:
+        return None
+    sizes = [size for size in map(process_rss, pids) if size is not None]
+    return sum(sizes) if sizes else None
+
+
+async def page_js_heap(page):
+    """Занятая JS-куча страницы в байтах (CDP Runtime.getHeapUsage); None при ошибке"""
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            usage = await cdp.send("Runtime.getHeapUsage")
+        finally:
+            await cdp.detach()
+        return int(usage["usedSize"])
+    except Exception:
+        return None
+
+
+class BrowserMemoryMonitor:
+    """
+    Замер памяти браузера за запуск: в начале, пик (фоновый опрос раз в interval секунд)
+    и в конце. Итог — одна строка для лога.
+    """
+
+    def __init__(self, browser, interval: float = 15.0):
+        self.browser = browser
+        self.interval = interval
+        self.start_rss = None
+        self.peak_rss = None
+        self.last_rss = None
+        self._task = None
+
+    async def sample(self):
+        rss = await browser_rss(self.browser)
+        if rss is not None:
+            self.last_rss = rss
+            self.peak_rss = rss if self.peak_rss is None else max(self.peak_rss, rss)
+        return rss
+
+    async def start(self):
+        self.start_rss = await self.sample()
+        self._task = asyncio.create_task(self._poll())
+        return self
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.sample()
+
+    async def stop(self) -> str:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sample()
+        return self.summary()
+
+    def summary(self) -> str:
+        return (
+            f"Память браузера: в начале {format_mb(self.start_rss)}, "
+            f"пик {format_mb(self.peak_rss)}, в конце {format_mb(self.last_rss)}"
+        )
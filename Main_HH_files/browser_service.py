@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from Main_HH_files.har_archive import HarArchive
+
+DEFAULT_LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--disable-web-security",
+    "--disable-site-isolation-trials",
+]
+
+# Экономный профиль для фонового режима (серверы без дисплея): без GPU, фоновых сервисов
+# и /dev/shm, который в контейнерах обычно слишком мал
+LEAN_LAUNCH_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--mute-audio",
+]
+
+
+class BrowserService:
+    """
+    Тёплый браузер Chromium, общий для нескольких запусков парсеров.
+    Браузер запускается один раз (можно заранее — warm_up) и перезапускается,
+    только если процесс был закрыт или сменился режим (с окном / фоновый).
+    Каждый запуск парсера работает в своём контексте.
+    """
+
+    def __init__(self, headless: bool = False, launch_args=None, lean=None):
+        """
+        Args:
+            headless: Фоновый режим без окна браузера
+            launch_args: Аргументы Chromium; None — DEFAULT_LAUNCH_ARGS
+            lean: Добавлять LEAN_LAUNCH_ARGS; None — только в фоновом режиме
+        """
+        self.headless = headless
+        self.launch_args = list(DEFAULT_LAUNCH_ARGS if launch_args is None else launch_args)
+        self.lean = lean
+        # async-функции (context) -> None, вызываются для каждого контекста из new_context
+        # (например, подмена hh.ru локальным сервером в бенчмарках или HAR)
+        self.context_hooks = []
+        self._playwright = None
+        self._browser = None
+        self._lock = None
+
+    def _launch_args(self) -> list[str]:
+        lean = self.headless if self.lean is None else self.lean
+        return self.launch_args + (LEAN_LAUNCH_ARGS if lean else [])
+
+    async def get_browser(self, headless: bool = None):
+        """
+        Возвращает запущенный браузер, при необходимости запуская его заново.
+        Args:
+            headless: Требуемый режим; если запущен браузер в другом режиме — он перезапускается
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if headless is not None and headless != self.headless:
+                self.headless = headless
+                if self._browser is not None and self._browser.is_connected():
+                    await self._browser.close()
+                self._browser = None
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=self.headless, args=self._launch_args()
+                )
+            return self._browser
+
+    async def new_context(self, **options):
+        """Новый контекст в текущем браузере с применёнными context_hooks"""
+        browser = await self.get_browser()
+        context = await browser.new_context(**options)
+        for hook in self.context_hooks:
+            await hook(context)
+        return context
+
+    def add_har(self, path: str, mode: str) -> HarArchive:
+        """Подключает запись (record) или воспроизведение (replay) HAR ко всем новым контекстам"""
+        archive = HarArchive(path, mode)
+        self.context_hooks.append(archive)
+        return archive
+
+    def remove_hook(self, hook):
+        """Отключает хук контекста (общий сервис переживает запуск, хуки запуска — нет)"""
+        if hook in self.context_hooks:
+            self.context_hooks.remove(hook)
+
+    async def warm_up(self, headless: bool = None):
+        """Заранее запускает браузер, чтобы первый запуск парсера не ждал холодного старта"""
+        await self.get_browser(headless)
+
+    async def close(self):
+        """Закрывает браузер и Playwright"""
+        try:
+            if self._browser is not None and self._browser.is_connected():
+                await self._browser.close()
+        finally:
+            self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+@asynccontextmanager
+async def browser_scope(service: BrowserService = None, **options):
+    """
+    Общий сервис, если он передан (браузер остаётся открытым),
+    иначе временный — закрывается вместе с браузером на выходе.
+    """
+    if service is not None:
+        yield service
+        return
+    async with BrowserService(**options) as own_service:
+        yield own_service
@@ -0,0 +1,82 @@
+import asyncio
+
+# Фрагменты сообщений Playwright, означающих, что браузер, контекст или вкладка умерли
+CLOSED_ERROR_MARKERS = (
+    "has been closed",
+    "Target closed",
+    "Target crashed",
+    "Page crashed",
+    "Connection closed",
+    "Browser closed",
+)
+
+
+def is_browser_gone_error(error: BaseException) -> bool:
+    """Ошибка вызвана падением браузера/контекста/вкладки, а не конкретной страницей"""
+    message = str(error)
+    return any(marker in message for marker in CLOSED_ERROR_MARKERS)
+
+
+class BrowserSupervisor:
+    """
+    Следит за браузером во время запуска: замечает упавший процесс, закрытый контекст
+    или «крашнувшую» вкладку и поднимает всё заново через BrowserService.
+    Количество перезапусков ограничено, между ними — нарастающая пауза.
+    """
+
+    def __init__(self, service, open_context, headless: bool = None, max_restarts: int = 3):
+        """
+        Args:
+            service: BrowserService, который перезапускает Chromium при необходимости
+            open_context: async-функция () -> новый рабочий контекст (через тот же service)
+            headless: Режим браузера при перезапуске
+            max_restarts: Сколько перезапусков допускается за запуск
+        """
+        self.service = service
+        self.open_context = open_context
+        self.headless = headless
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self._crashed_pages = set()
+
+    async def new_page(self, context):
+        """Новая вкладка, за падением которой следит супервизор"""
+        page = await context.new_page()
+        page.on("crash", self._crashed_pages.add)
+        return page
+
+    def is_healthy(self, context, pages) -> bool:
+        browser = context.browser
+        if browser is not None and not browser.is_connected():
+            return False
+        return not any(page.is_closed() or page in self._crashed_pages for page in pages)
+
+    async def restart(self, context, pages: list, reason: str):
+        """
+        Закрывает остатки старого контекста и открывает новый с тем же количеством вкладок.
+        Return: (новый контекст, новые вкладки)
+        Raises: RuntimeError, если лимит перезапусков исчерпан
+        """
+        self.restarts += 1
+        if self.restarts > self.max_restarts:
+            raise RuntimeError(
+                f"Браузер не восстановился после {self.max_restarts} перезапусков ({reason})"
+            )
+        print(f"Перезапуск браузера {self.restarts}/{self.max_restarts}: {reason}")
+
+        for page in pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        try:
+            await context.close()
+        except Exception:
+            pass
+        self._crashed_pages.clear()
+
+        await asyncio.sleep(2 ** self.restarts)  # Даём системе освободить память упавшего процесса
+        await self.service.get_browser(self.headless)
+        new_context = await self.open_context()
+        new_pages = [await self.new_page(new_context) for _ in range(len(pages))]
+        return new_context, new_pages
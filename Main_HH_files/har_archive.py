@@ -0,0 +1,59 @@
+import os
+
+HAR_DIR = "hh_parse_results/har"
+
+HAR_MODES = ("record", "replay")
+
+
+class HarArchive:
+    """
+    Запись трафика запуска в HAR и воспроизведение из него через маршрутизацию контекста.
+    Подключается к BrowserService как хук контекста.
+
+    record — запросы идут в сеть и сохраняются в архив при закрытии контекста.
+             Если за запуск открывается несколько контекстов (пересоздание, перезапуск браузера),
+             каждый пишет свой файл: run.har, run.1.har, run.2.har...
+    replay — ответы берутся из архива (всех его частей), сеть не используется:
+             запрос, которого нет в архиве, отклоняется.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in HAR_MODES:
+            raise ValueError(f"Неизвестный режим HAR: {mode} (ожидается record или replay)")
+        self.path = path
+        self.mode = mode
+        self._contexts = 0
+
+    def _part_path(self, index: int) -> str:
+        if index == 0:
+            return self.path
+        base, ext = os.path.splitext(self.path)
+        return f"{base}.{index}{ext}"
+
+    def parts(self) -> list[str]:
+        """Все части архива по порядку записи"""
+        paths = []
+        while os.path.exists(self._part_path(len(paths))):
+            paths.append(self._part_path(len(paths)))
+        return paths
+
+    async def __call__(self, context):
+        if self.mode == "record":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if self._contexts == 0:
+                # Части прошлой записи с тем же именем иначе подмешались бы при воспроизведении
+                for stale in self.parts():
+                    os.remove(stale)
+            path = self._part_path(self._contexts)
+            self._contexts += 1
+            await context.route_from_har(path, update=True, update_content="embed")
+            return
+
+        parts = self.parts()
+        if not parts:
+            raise FileNotFoundError(f"HAR-архив не найден: {self.path}")
+        # Маршрут, добавленный последним, срабатывает первым: сначала «нет в архиве — отклонить»,
+        # поверх него части архива с передачей дальше, если запроса в части нет
+        await context.route("**/*", lambda route: route.abort())
+        for path in reversed(parts):
+            await context.route_from_har(path, not_found="fallback")
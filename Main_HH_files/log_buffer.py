@@ -0,0 +1,71 @@
+import os
+import queue
+import datetime
+
+LOG_DIR = "hh_parse_results/logs"
+
+ERROR_WORDS = ("ошибка", "error", "closed", "exception", "failed", "прервано")
+WARNING_WORDS = ("предупреждение", "warning", "внимание", "остановлен")
+SUCCESS_WORDS = ("успешно", "success", "завершен", "готово", "успешн")
+
+
+def classify(message: str) -> str:
+    """Уровень строки лога по ключевым словам"""
+    msg_lower = message.lower()
+    if any(word in msg_lower for word in ERROR_WORDS):
+        return "ERROR"
+    if any(word in msg_lower for word in WARNING_WORDS):
+        return "WARNING"
+    if any(word in msg_lower for word in SUCCESS_WORDS):
+        return "SUCCESS"
+    return "INFO"
+
+
+class LogBuffer:
+    """
+    Очередь сообщений лога между потоками парсера и GUI.
+    put можно вызывать из любого потока; GUI забирает накопленное пачкой (drain) по таймеру.
+    Полный лог дописывается в файл — окно показывает только последние строки.
+    """
+
+    def __init__(self, directory: str = LOG_DIR):
+        self.queue = queue.SimpleQueue()
+        self.path = os.path.join(directory, f"gui_{datetime.date.today():%Y%m%d}.log")
+        self._file = None
+
+    def put(self, message: str, level: str = None):
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self.queue.put((timestamp, level or classify(message), message))
+
+    def drain(self, limit: int = None) -> list[tuple[str, str]]:
+        """
+        Забирает все накопленные сообщения и пишет их в файл одним вызовом.
+        Return: Строки (текст, уровень) для окна; при limit — только последние limit
+        """
+        lines = []
+        while True:
+            try:
+                timestamp, level, message = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            lines.append((f"[{timestamp}] [{level}] {message}\n", level))
+        if lines:
+            self._write([text for text, _ in lines])
+        return lines[-limit:] if limit else lines
+
+    def _write(self, texts: list[str]):
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write("".join(texts))
+            self._file.flush()
+        except OSError as e:
+            print(f"Не удалось записать лог в файл: {e}")
+
+    def close(self):
+        """Дописывает остаток очереди в файл и закрывает его"""
+        self.drain()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
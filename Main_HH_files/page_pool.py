@@ -0,0 +1,87 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class PagePool:
+    """
+    Пул переиспользуемых вкладок одного контекста.
+    Вкладки создаются лениво (не больше size), после работы возвращаются в пул;
+    закрытая или сломанная вкладка выбрасывается и при следующем запросе заменяется новой.
+    """
+
+    def __init__(self, context, size: int = 1):
+        self.context = context
+        self.size = size
+        self.created = 0  # Сколько вкладок открыто за всё время
+        self.reused = 0  # Сколько раз вкладка взята из пула повторно
+        self._idle = asyncio.Queue()
+        self._in_use = set()
+        self._slots = asyncio.Semaphore(size)
+        self._closed = False
+
+    async def acquire(self):
+        """Берёт свободную вкладку (при необходимости ждёт освобождения или открывает новую)"""
+        if self._closed:
+            raise RuntimeError("Пул вкладок закрыт")
+        await self._slots.acquire()
+        try:
+            page = None
+            while not self._idle.empty():
+                candidate = self._idle.get_nowait()
+                if not candidate.is_closed():
+                    page = candidate
+                    self.reused += 1
+                    break
+            if page is None:
+                page = await self.context.new_page()
+                self.created += 1
+        except BaseException:
+            self._slots.release()
+            raise
+        self._in_use.add(page)
+        return page
+
+    async def release(self, page, discard: bool = False):
+        """Возвращает вкладку в пул; discard=True — закрыть и не использовать повторно"""
+        if page not in self._in_use:
+            return
+        self._in_use.discard(page)
+        try:
+            if discard or self._closed or page.is_closed():
+                await self._close_page(page)
+            else:
+                self._idle.put_nowait(page)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def page(self):
+        """Вкладка на время блока with; возвращается в пул при любом исходе"""
+        page = await self.acquire()
+        discard = False
+        try:
+            yield page
+        except asyncio.CancelledError:
+            discard = True  # После отмены состояние навигации неизвестно — вкладку не переиспользуем
+            raise
+        finally:
+            await asyncio.shield(self.release(page, discard=discard))
+
+    async def close(self):
+        """Закрывает все вкладки пула"""
+        self._closed = True
+        pages = list(self._in_use)
+        while not self._idle.empty():
+            pages.append(self._idle.get_nowait())
+        self._in_use.clear()
+        for page in pages:
+            await self._close_page(page)
+
+    @staticmethod
+    async def _close_page(page):
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+
@@ -0,0 +1,41 @@
+from playwright.async_api import TimeoutError as PWTimeoutError
+
+
+async def wait_ready(page, selector: str, timeout: float = 5000, state: str = "attached") -> bool:
+    """
+    Ждёт элемент, который означает готовность страницы, вместо фиксированной паузы.
+    Return: False, если за timeout мс элемент так и не появился (или не исчез при state="hidden")
+    """
+    try:
+        await page.wait_for_selector(selector, state=state, timeout=timeout)
+        return True
+    except PWTimeoutError:
+        return False
+
+
+async def click_and_wait_page_change(page, element, ready_selector: str, timeout: float = 15000) -> bool:
+    """
+    Клик по ссылке пагинации и ожидание новой страницы: смены URL (обычный переход
+    или history API), замены старых результатов и появления новых.
+    При переходе через history API URL меняется раньше DOM — без проверки замены
+    можно прочитать карточки предыдущей страницы.
+    """
+    old_url = page.url
+    old_first = await page.query_selector(ready_selector)
+    await element.click()
+    try:
+        await page.wait_for_url(lambda url: url != old_url, wait_until="domcontentloaded", timeout=timeout)
+        if old_first is not None:
+            try:
+                await page.wait_for_function(
+                    "([el, sel]) => !el.isConnected || document.querySelector(sel) !== el",
+                    [old_first, ready_selector],
+                    timeout=timeout,
+                )
+            except PWTimeoutError:
+                raise
+            except Exception:
+                pass  # Полная перезагрузка: старый документ уничтожен вместе с элементом
+    except PWTimeoutError:
+        return False
+    return await wait_ready(page, ready_selector, timeout)
@@ -0,0 +1,82 @@
+from collections import Counter
+
+# Типы ресурсов, которые парсеру не нужны: данные берутся только из DOM
+DEFAULT_BLOCKED_TYPES = frozenset({"image", "media", "font"})
+
+# Сторонняя аналитика и реклама (подстроки URL)
+DEFAULT_BLOCKED_PATTERNS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "mc.yandex.ru",
+    "an.yandex.ru",
+    "top-fwz1.mail.ru",
+    "vk.com/rtrg",
+    "facebook.net",
+    "adsrv.hh.ru",
+)
+
+# Средний размер ответа по типу — заблокированный ответ не скачивается,
+# поэтому сэкономленный трафик оценивается, а не измеряется
+AVERAGE_SIZE_BYTES = {
+    "image": 40_000,
+    "media": 300_000,
+    "font": 50_000,
+    "script": 60_000,
+    "stylesheet": 30_000,
+}
+DEFAULT_SIZE_BYTES = 10_000
+
+
+class ResourceBlocker:
+    """
+    Перехват запросов на уровне контекста браузера: ненужные типы ресурсов и адреса
+    аналитики отклоняются до загрузки. Ведёт счётчики заблокированных запросов за запуск.
+    """
+
+    def __init__(self, block_types=DEFAULT_BLOCKED_TYPES, block_patterns=DEFAULT_BLOCKED_PATTERNS):
+        self.block_types = set(block_types)
+        self.block_patterns = tuple(block_patterns)
+        self.blocked_by_type = Counter()
+        self.allowed_requests = 0
+        self.saved_bytes = 0  # Оценка по AVERAGE_SIZE_BYTES
+        self._contexts = []
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(self.blocked_by_type.values())
+
+    async def install(self, context):
+        """Подключает перехват к контексту (повторный вызов для того же контекста ничего не делает)"""
+        if any(installed is context for installed in self._contexts):
+            return
+        await context.route("**/*", self._handle_route)
+        self._contexts.append(context)
+
+    def _should_block(self, request) -> bool:
+        if request.resource_type in self.block_types:
+            return True
+        url = request.url
+        return any(pattern in url for pattern in self.block_patterns)
+
+    async def _handle_route(self, route):
+        request = route.request
+        if self._should_block(request):
+            resource_type = request.resource_type
+            self.blocked_by_type[resource_type] += 1
+            self.saved_bytes += AVERAGE_SIZE_BYTES.get(resource_type, DEFAULT_SIZE_BYTES)
+            await route.abort()
+        else:
+            self.allowed_requests += 1
+            # fallback, а не continue_: запрос может обработать другой перехватчик (например, HAR)
+            await route.fallback()
+
+    def summary(self) -> str:
+        """Итоги запуска одной строкой для лога"""
+        by_type = ", ".join(f"{name}: {count}" for name, count in self.blocked_by_type.most_common())
+        return (
+            f"Заблокировано запросов: {self.blocked_requests} из "
+            f"{self.blocked_requests + self.allowed_requests}"
+            + (f" ({by_type})" if by_type else "")
+            + f", сэкономлено ≈ {self.saved_bytes / 1_048_576:.1f} МБ"
+        )
@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import datetime
+import threading
+from openpyxl import Workbook
+
+DEFAULT_DB_PATH = "hh_parse_results/hh_results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode        TEXT NOT NULL,
+    source      TEXT,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    status      TEXT NOT NULL DEFAULT 'running',
+    records     INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS collected_urls (
+    vacancy_id   TEXT PRIMARY KEY,
+    url          TEXT NOT NULL,
+    run_id       INTEGER REFERENCES runs(run_id),
+    collected_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS vacancies (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    vacancy_id TEXT UNIQUE,
+    url        TEXT,
+    title      TEXT,
+    company    TEXT,
+    city       TEXT,
+    phone      TEXT,
+    fio        TEXT,
+    mode       TEXT NOT NULL,
+    run_id     INTEGER REFERENCES runs(run_id),
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_collected_urls_run ON collected_urls(run_id);
+CREATE INDEX IF NOT EXISTS idx_vacancies_run ON vacancies(run_id);
+"""
+
+# Excel-файлы — это представления поверх таблиц: (лист, заголовки, запрос)
+EXPORT_VIEWS = {
+    "phone": (
+        "Sheet1",
+        ["URL", "Название вакансии", "Название компании", "Телефон", "ФИО"],
+        "SELECT url, title, company, phone, fio FROM vacancies WHERE run_id = ? ORDER BY id",
+    ),
+    "notice": (
+        "Sheet1",
+        ["Вакансия", "Компания", "Город", "Номер"],
+        "SELECT title, company, city, phone FROM vacancies WHERE run_id = ? ORDER BY id",
+    ),
+    "urls": (
+        "HH Vacancies URLs",
+        ["Ссылка на вакансию"],
+        "SELECT url FROM collected_urls WHERE run_id = ? ORDER BY rowid",
+    ),
+}
+
+VACANCY_FIELDS = ("vacancy_id", "url", "title", "company", "city", "phone", "fio")
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class ResultStore:
+    """
+    Общее хранилище результатов всех режимов парсинга (SQLite в режиме WAL).
+    Вакансии и собранные ссылки хранятся по ID вакансии, история запусков — в таблице runs.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        # Соединение используется из потока записи, event loop и GUI — доступ через блокировку
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def start_run(self, mode: str, source: str = None) -> int:
+        """Регистрирует новый запуск и возвращает его ID"""
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (mode, source, started_at) VALUES (?, ?, ?)",
+                (mode, source, _now()),
+            )
+            return cur.lastrowid
+
+    def resume_run(self, run_id: int) -> bool:
+        """Возобновляет прерванный запуск; False, если такого запуска в базе нет"""
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "UPDATE runs SET status = 'running', finished_at = NULL WHERE run_id = ?",
+                (run_id,),
+            )
+            return cur.rowcount > 0
+
+    def finish_run(self, run_id: int, status: str = "completed"):
+        """Отмечает завершение запуска"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?",
+                (_now(), status, run_id),
+            )
+
+    def add_urls(self, run_id: int, links: list[dict]):
+        """
+        Сохраняет собранные ссылки одной транзакцией.
+        Args:
+            links: Список словарей {"url": ..., "id": ...}
+        """
+        rows = [(link["id"], link["url"], run_id, _now()) for link in links if link.get("id")]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO collected_urls (vacancy_id, url, run_id, collected_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(vacancy_id) DO UPDATE SET
+                    url = excluded.url,
+                    run_id = excluded.run_id,
+                    collected_at = excluded.collected_at
+                """,
+                rows,
+            )
+            self.conn.execute(
+                "UPDATE runs SET records = records + ? WHERE run_id = ?", (len(rows), run_id)
+            )
+
+    def add_vacancies(self, run_id: int, mode: str, records: list[dict]):
+        """
+        Сохраняет данные вакансий одной транзакцией.
+        Поля, которых нет в записи (например, город в режиме телефонов), не затирают уже известные.
+        """
+        if not records:
+            return
+        now = _now()
+        rows = [
+            tuple(record.get(field) for field in VACANCY_FIELDS) + (mode, run_id, now)
+            for record in records
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO vacancies (vacancy_id, url, title, company, city, phone, fio,
+                                       mode, run_id, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(vacancy_id) DO UPDATE SET
+                    url = COALESCE(excluded.url, url),
+                    title = COALESCE(excluded.title, title),
+                    company = COALESCE(excluded.company, company),
+                    city = COALESCE(excluded.city, city),
+                    phone = COALESCE(excluded.phone, phone),
+                    fio = COALESCE(excluded.fio, fio),
+                    mode = excluded.mode,
+                    run_id = excluded.run_id,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+            self.conn.execute(
+                "UPDATE runs SET records = records + ? WHERE run_id = ?", (len(rows), run_id)
+            )
+
+    def count_records(self, run_id: int) -> int:
+        """Количество записей, сохранённых за запуск"""
+        with self._lock:
+            row = self.conn.execute("SELECT records FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] if row else 0
+
+    def export_xlsx(self, view: str, path: str, run_id: int) -> int:
+        """
+        Выгружает представление в xlsx потоково (write_only), без загрузки всего в память.
+        Args:
+            view: Ключ из EXPORT_VIEWS ("phone", "notice", "urls")
+            path: Путь к итоговому xlsx
+            run_id: Запуск, записи которого выгружаются
+        Return: Количество выгруженных строк
+        """
+        sheet_title, headers, query = EXPORT_VIEWS[view]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_title)
+        ws.append(headers)
+
+        count = 0
+        with self._lock:
+            for row in self.conn.execute(query, (run_id,)):
+                ws.append(list(row))
+                count += 1
+
+        # Пишем во временный файл и подменяем, чтобы не оставить битый xlsx
+        tmp_path = path + ".tmp"
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+        return count
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,121 @@
+import os
+import hashlib
+import threading
+
+JOURNAL_DIR = "hh_parse_results/journals"
+
+
+def _file_digest(path) -> str:
+    """SHA-1 содержимого файла (читаем кусками, чтобы не грузить большой файл целиком)"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """
+    Журнал запуска для продолжения после сбоя.
+    Append-only файл: ID запуска, ID обработанных вакансий и курсор — позиция во входном
+    списке, до которой всё обработано. Журнал привязан к содержимому входного файла,
+    поэтому повторный запуск с тем же файлом продолжает с места остановки.
+
+    Формат строк:
+        R <run_id>   — запуск в хранилище, к которому относятся записи
+        D <id>       — вакансия обработана
+        C <n>        — первые n ссылок входного списка обработаны
+        END          — запуск завершён полностью
+    """
+
+    def __init__(self, input_file, journal_dir: str = JOURNAL_DIR):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = os.path.join(journal_dir, f"{_file_digest(input_file)[:16]}.journal")
+        self.run_id = None
+        self.done_ids = set()
+        self.cursor = 0
+        self._order = []
+        self._lock = threading.Lock()  # record вызывается из потока записи
+        self._load()
+
+    def _load(self):
+        """Читает журнал прерванного запуска; завершённый журнал начинается заново"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+        if lines and lines[-1] == "END":
+            os.remove(self.path)
+            return
+
+        for line in lines:
+            tag, _, value = line.partition(" ")
+            try:
+                if tag == "D":
+                    self.done_ids.add(value)
+                elif tag == "C":
+                    self.cursor = max(self.cursor, int(value))
+                elif tag == "R":
+                    self.run_id = int(value)
+            except ValueError:
+                continue  # Недописанная строка после сбоя
+
+    def _append(self, lines: list[str]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{line}\n" for line in lines))
+
+    def begin(self, run_id: int):
+        """
+        Начинает журнал заново для нового запуска в хранилище: отметки прежнего запуска
+        (если его не удалось продолжить) стираются, иначе его ссылки молча пропустятся
+        """
+        with self._lock:
+            self.run_id = run_id
+            self.done_ids = set()
+            self.cursor = 0
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(f"R {run_id}\n")
+
+    def pending_positions(self, ids: list) -> list[int]:
+        """
+        Запоминает порядок входного списка и возвращает позиции ещё не обработанных ссылок.
+        Args:
+            ids: ID вакансий входного списка по порядку (None, если ID не распознан)
+        """
+        self._order = list(ids)
+        self.cursor = min(self.cursor, len(self._order))
+        return [
+            pos
+            for pos in range(self.cursor, len(self._order))
+            if self._order[pos] not in self.done_ids
+        ]
+
+    def record(self, ids):
+        """Фиксирует обработанные вакансии и сдвигает курсор (после записи их данных)"""
+        with self._lock:
+            new_ids = [vid for vid in ids if vid and vid not in self.done_ids]
+            self.done_ids.update(new_ids)
+
+            cursor = self.cursor
+            while cursor < len(self._order) and self._order[cursor] in self.done_ids:
+                cursor += 1
+
+            lines = [f"D {vid}" for vid in new_ids]
+            if cursor != self.cursor:
+                self.cursor = cursor
+                lines.append(f"C {cursor}")
+            if lines:
+                self._append(lines)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.cursor >= len(self._order)
+
+    def finish(self) -> bool:
+        """Закрывает журнал, если весь входной список обработан; иначе оставляет для продолжения"""
+        if not self.is_complete:
+            return False
+        self._append(["END"])
+        return True
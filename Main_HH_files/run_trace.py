@@ -0,0 +1,182 @@
+"""
+Трасса запуска: по одной JSON-строке на обработанную ссылку с длительностью этапов
+(переход, извлечение, клик по контактам...) и итогом, плюс строки записи партий.
+
+Сводка по трассе — перцентили этапов и самые медленные ссылки:
+    python -m Main_HH_files.run_trace                      # последняя трасса в hh_parse_results/traces
+    python -m Main_HH_files.run_trace путь/к/trace.jsonl --top 20
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from collections import Counter, defaultdict
+
+TRACE_DIR = "hh_parse_results/traces"
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Span:
+    """Замеры одной ссылки: этапы суммируются (повторный клик — в тот же этап)"""
+
+    def __init__(self, url: str, attempt: int = 1):
+        self.url = url
+        self.attempt = attempt
+        self.stages = {}  # этап -> мс
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    @property
+    def wall_ms(self) -> float:
+        """Время от начала обработки ссылки, включая паузы и ожидание соседних вкладок"""
+        return (time.perf_counter() - self._started) * 1000
+
+
+class RunTrace:
+    """
+    JSONL-файл трассы одного запуска. Строки пишутся сразу (построчная буферизация),
+    поэтому трасса прерванного запуска тоже читается. Писать можно из event loop
+    и из потока записи результатов.
+    """
+
+    def __init__(self, mode: str, run_id=None, directory: str = TRACE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_id = run_id
+        self.path = os.path.join(directory, f"{mode}_{stamp}.jsonl")
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def _write(self, record: dict):
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "run": self.run_id, **record}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+
+    def finish(self, span: Span, outcome: str, **extra):
+        """Записывает итог ссылки; extra — дополнительные поля (например, ошибка)"""
+        self._write(
+            {
+                "kind": "url",
+                "url": span.url,
+                "attempt": span.attempt,
+                "outcome": outcome,
+                "wall_ms": round(span.wall_ms, 1),
+                "stages": {name: round(ms, 1) for name, ms in span.stages.items()},
+                **extra,
+            }
+        )
+
+    @contextmanager
+    def batch_write(self, rows: int):
+        """Замер записи партии в хранилище (этап write в сводке); оборачивает сам sink потока записи"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._write(
+                {"kind": "write", "rows": rows, "ms": round((time.perf_counter() - started) * 1000, 1)}
+            )
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path: str) -> list[dict]:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass  # Последняя строка оборванного запуска
+    return records
+
+
+def latest_trace(directory: str = TRACE_DIR):
+    if not os.path.isdir(directory):
+        return None
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl")]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def summarize(records: list[dict], top: int = 10) -> str:
+    """Сводка трассы: перцентили по этапам, итоги ссылок, самые медленные ссылки"""
+    spans = [r for r in records if r.get("kind") == "url"]
+    stages = defaultdict(list)
+    for span in spans:
+        stages["wall"].append(span["wall_ms"])
+        for name, ms in span["stages"].items():
+            stages[name].append(ms)
+    for record in records:
+        if record.get("kind") == "write":
+            stages["write"].append(record["ms"])
+
+    lines = [f"Ссылок: {len(spans)}"]
+    outcomes = Counter(span["outcome"] for span in spans)
+    if outcomes:
+        lines.append("Итоги: " + ", ".join(f"{name}: {count}" for name, count in outcomes.most_common()))
+
+    if stages:
+        lines.append("")
+        lines.append(f"{'этап':<14}{'кол-во':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'макс':>10}  (мс)")
+        for name, values in sorted(stages.items(), key=lambda item: item[0] != "wall"):
+            lines.append(
+                f"{name:<14}{len(values):>8}"
+                f"{percentile(values, 50):>10.0f}{percentile(values, 95):>10.0f}"
+                f"{percentile(values, 99):>10.0f}{max(values):>10.0f}"
+            )
+
+    slowest = sorted(spans, key=lambda span: span["wall_ms"], reverse=True)[:top]
+    if slowest:
+        lines.append("")
+        lines.append(f"Самые медленные ссылки (топ {len(slowest)}):")
+        for span in slowest:
+            breakdown = ", ".join(f"{name} {ms:.0f}" for name, ms in span["stages"].items())
+            lines.append(f"  {span['wall_ms']:>8.0f} мс  {span['outcome']:<12} {span['url']}  [{breakdown}]")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сводка по трассе запуска")
+    parser.add_argument("path", nargs="?", help="Файл трассы; по умолчанию последний в " + TRACE_DIR)
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых медленных ссылок показать")
+    args = parser.parse_args(argv)
+
+    path = args.path or latest_trace()
+    if path is None or not os.path.exists(path):
+        print("Трасса не найдена")
+        return 1
+    print(f"Трасса: {path}")
+    print(summarize(read_trace(path), args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+import time
+import struct
+import bisect
+import threading
+from array import array
+
+SEEN_INDEX_PATH = "hh_parse_results/seen_vacancies.idx"
+
+_MAGIC = b"HHSEEN1\0"
+_HEADER = struct.Struct("<8sQ")  # сигнатура + количество записей
+
+
+def _today() -> int:
+    """Номер текущего дня от начала эпохи (точности дня для TTL достаточно)"""
+    return int(time.time() // 86400)
+
+
+class SeenIndex:
+    """
+    Индекс уже собранных вакансий между запусками.
+    Хранится компактно: отсортированный массив ID (uint64) и параллельный массив дней
+    отметки (uint32). Файл читается двумя frombytes — миллионы ID загружаются за миллисекунды,
+    поиск — бинарный.
+    """
+
+    def __init__(self, path: str = SEEN_INDEX_PATH, ttl_days: int = 7):
+        """
+        Args:
+            path: Файл индекса
+            ttl_days: Сколько дней вакансия считается собранной; None — бессрочно
+        """
+        self.path = path
+        self.ttl_days = ttl_days
+        self.ids = array("Q")
+        self.days = array("I")
+        self._added = {}  # Новые отметки до save(): id -> день
+        self._lock = threading.Lock()  # add вызывается из потока записи
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                magic, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    raise ValueError("неизвестный формат")
+                self.ids.frombytes(f.read(count * self.ids.itemsize))
+                self.days.frombytes(f.read(count * self.days.itemsize))
+            if len(self.ids) != count or len(self.days) != count:
+                raise ValueError("файл обрезан")
+        except Exception as e:
+            print(f"Индекс собранных вакансий не прочитан ({e}), начинаем с пустого")
+            self.ids = array("Q")
+            self.days = array("I")
+
+    def _is_fresh(self, day: int) -> bool:
+        return self.ttl_days is None or day > _today() - self.ttl_days
+
+    def __contains__(self, vacancy_id) -> bool:
+        if not vacancy_id:
+            return False
+        key = int(vacancy_id)
+        day = self._added.get(key)
+        if day is None:
+            pos = bisect.bisect_left(self.ids, key)
+            if pos == len(self.ids) or self.ids[pos] != key:
+                return False
+            day = self.days[pos]
+        return self._is_fresh(day)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self._added)
+
+    def add(self, vacancy_ids):
+        """Отмечает вакансии как собранные сегодня"""
+        today = _today()
+        with self._lock:
+            for vacancy_id in vacancy_ids:
+                if vacancy_id:
+                    self._added[int(vacancy_id)] = today
+
+    def save(self):
+        """Сливает новые отметки с индексом, выбрасывает просроченные и атомарно перезаписывает файл"""
+        with self._lock:
+            merged = {
+                key: day
+                for key, day in zip(self.ids, self.days)
+                if self._is_fresh(day)
+            }
+            merged.update(self._added)
+            keys = sorted(merged)
+            self.ids = array("Q", keys)
+            self.days = array("I", (merged[key] for key in keys))
+            self._added = {}
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, len(self.ids)))
+                f.write(self.ids.tobytes())
+                f.write(self.days.tobytes())
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,46 @@
+from collections import Counter
+
+
+class SelectorRegistry:
+    """
+    Варианты селектора одного элемента (вёрстка HH периодически меняется).
+    Сработавший вариант запоминается и проверяется первым, остальные — по числу попаданий.
+    Статистика попаданий и промахов показывает, когда разметка сдвинулась.
+    """
+
+    def __init__(self, name: str, variants: list[str]):
+        self.name = name
+        self.variants = list(variants)
+        self.hits = Counter()  # Попадания по вариантам
+        self.first_try_hits = 0  # Сработал вариант, проверенный первым
+        self.misses = 0  # Не сработал ни один вариант
+        self._last_hit = None
+
+    def ordered(self) -> list[str]:
+        """Порядок проверки: последний сработавший, затем по убыванию попаданий, затем исходный"""
+        return sorted(self.variants, key=lambda v: (v != self._last_hit, -self.hits[v]))
+
+    @property
+    def combined(self) -> str:
+        """Все варианты одним селектором (для ожидания «любой из»)"""
+        return ", ".join(self.variants)
+
+    def record_hit(self, variant: str, attempt: int):
+        """Отмечает сработавший вариант; attempt — номер попытки, начиная с 0"""
+        self.hits[variant] += 1
+        if attempt == 0:
+            self.first_try_hits += 1
+        self._last_hit = variant
+
+    def record_miss(self):
+        self.misses += 1
+
+    def summary(self) -> str:
+        total = sum(self.hits.values()) + self.misses
+        by_variant = ", ".join(
+            f"#{self.variants.index(variant) + 1}: {count}" for variant, count in self.hits.most_common()
+        )
+        return (
+            f"{self.name}: с первой попытки {self.first_try_hits}/{total}, промахов {self.misses}"
+            + (f" (варианты {by_variant})" if by_variant else "")
+        )
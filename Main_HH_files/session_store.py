@@ -0,0 +1,93 @@
+import os
+import json
+import time
+from Main_HH_files.page_waits import wait_ready
+
+SESSION_STATE_PATH = "hh_parse_results/session/hh_storage_state.json"
+
+# Кнопка «Войти» в шапке есть только у неавторизованного пользователя
+LOGIN_MARKER_SELECTOR = '[data-qa="login"]'
+# Элементы шапки авторизованного пользователя (соискатель или работодатель)
+AUTH_MARKER_SELECTOR = (
+    '[data-qa="mainmenu_applicantProfile"], [data-qa="mainmenu_employerProfile"], '
+    '[data-qa="mainmenu_myResumes"], [data-qa="mainmenu_profile"]'
+)
+# Страница вакансии догрузилась — только на ней отсутствие кнопки «Войти» что-то значит
+PAGE_READY_SELECTOR = '[data-qa="vacancy-title"]'
+
+
+class SessionStore:
+    """
+    Сохранённая сессия HH (cookies + localStorage в формате storage_state Playwright).
+    После ручного входа состояние контекста пишется в файл, а в следующих запусках
+    подставляется в browser.new_context — шаг ручного входа нужен, только если сессия истекла.
+    """
+
+    def __init__(self, path: str = SESSION_STATE_PATH, max_age_days: float = 14):
+        """
+        Args:
+            path: Файл с состоянием сессии
+            max_age_days: Старше этого файл не используется, сразу ручной вход; None — без ограничения
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+
+    def is_available(self) -> bool:
+        """Есть ли не просроченный файл сессии"""
+        if not os.path.exists(self.path):
+            return False
+        if self.max_age_days is None:
+            return True
+        age_days = (time.time() - os.path.getmtime(self.path)) / 86400
+        return age_days < self.max_age_days
+
+    def context_options(self) -> dict:
+        """Параметры для browser.new_context: storage_state, если сохранённая сессия есть"""
+        return {"storage_state": self.path} if self.is_available() else {}
+
+    async def is_logged_in(self, page, timeout: float = 3000) -> bool:
+        """
+        Проверка на уже открытой странице вакансии: страница догрузилась, кнопки «Войти» нет
+        и есть элемент шапки авторизованного пользователя. Пустая или недогруженная
+        страница (например, после таймаута перехода) сессию не подтверждает.
+        """
+        try:
+            if not await wait_ready(page, PAGE_READY_SELECTOR, timeout):
+                return False
+            if await page.query_selector(LOGIN_MARKER_SELECTOR) is not None:
+                return False
+            return await page.query_selector(AUTH_MARKER_SELECTOR) is not None
+        except Exception:
+            return False
+
+    async def is_logged_out(self, page, timeout: float = 3000) -> bool:
+        """
+        Сессия точно недействительна: страница вакансии догрузилась и на ней есть кнопка «Войти».
+        Таймаут, капча или недогруженная страница ничего не доказывают — тогда False.
+        """
+        try:
+            if not await wait_ready(page, PAGE_READY_SELECTOR, timeout):
+                return False
+            return await page.query_selector(LOGIN_MARKER_SELECTOR) is not None
+        except Exception:
+            return False
+
+    async def save(self, context):
+        """Сохраняет состояние контекста (атомарно, файл доступен только владельцу)"""
+        state = await context.storage_state()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        try:
+            os.chmod(tmp_path, 0o600)
+        except OSError:
+            pass
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Удаляет сохранённую сессию (когда сайт явно показал, что она не действует)"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,190 @@
+import os
+import re
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+VACANCY_ID_BASE = 100_000_000
+PER_PAGE = 20
+
+SERP_TEMPLATE = """<!doctype html>
+<html lang="ru"><head><meta charset="utf-8"><title>Поиск вакансий</title></head>
+<body>
+<main>
+{cards}
+</main>
+<nav>{pager}</nav>
+</body></html>
+"""
+
+SERP_CARD_TEMPLATE = """<div data-qa="vacancy-serp__vacancy">
+  <h2><a data-qa="serp-item__title" href="https://hh.ru/vacancy/{vacancy_id}?from=vacancy_search_list">Вакансия {vacancy_id}</a></h2>
+  <div data-qa="vacancy-serp__vacancy-employer">ООО «Компания {company}»</div>
+  <div data-qa="vacancy-serp__vacancy-address">{city}, ул. Ленина, д. {house}</div>
+</div>"""
+
+VACANCY_TEMPLATE = """<!doctype html>
+<html lang="ru"><head><meta charset="utf-8"><title>Вакансия {vacancy_id}</title></head>
+<body>
+<header><a data-qa="mainmenu_applicantProfile" href="#">Профиль</a></header>
+<h1 data-qa="vacancy-title">Вакансия {vacancy_id}</h1>
+<a data-qa="vacancy-company-name" href="#"><span>ООО «Компания {company}»</span></a>
+<p data-qa="vacancy-view-location">{city}</p>
+{contacts}
+<div style="height: 3000px">{filler}</div>
+</body></html>
+"""
+
+# Телефон сразу в DOM
+CONTACTS_INLINE = """<div data-qa="vacancy-contacts__fio">Иванова Анна</div>
+<div data-qa="vacancy-contacts__phone"><span data-qa="vacancy-contacts__phone-number">{phone}</span></div>"""
+
+# Телефон появляется после клика «Связаться» (задержка имитирует запрос контактов)
+CONTACTS_BEHIND_BUTTON = """<button data-qa="show-employer-contacts show-employer-contacts_top-button">Связаться</button>
+<div id="contacts"></div>
+<script>
+document.querySelector('button[data-qa^="show-employer-contacts"]').addEventListener('click', () => {{
+  setTimeout(() => {{
+    document.getElementById('contacts').innerHTML =
+      '<div class="magritte-drop-container"><div data-qa="vacancy-contacts__fio">Петров Олег</div>' +
+      '<div data-qa="vacancy-contacts__phone"><span data-qa="vacancy-contacts__phone-number">{phone}</span></div></div>';
+  }}, {reveal_ms});
+}});
+</script>"""
+
+CONTACTS_NONE = "<p>Контакты не указаны</p>"
+
+CITIES = ("Москва", "Саратов", "Казань", "Самара", "Пермь")
+
+
+def vacancy_ids(count: int) -> list[int]:
+    """ID вакансий, которые отдаёт сервер (первые count по порядку выдачи)"""
+    return [VACANCY_ID_BASE + i for i in range(count)]
+
+
+class FixtureServer:
+    """
+    Локальный HTTP-сервер со страницами, повторяющими разметку HH (data-qa атрибуты):
+    выдача /search/vacancy?page=N и страницы /vacancy/<id>. Задержка ответа
+    (latency_ms ± jitter_ms) и содержимое страниц детерминированы seed.
+    Если задан fixtures_dir, вместо шаблонов отдаются записанные страницы
+    serp_<page>.html и vacancy_<id>.html, когда они есть.
+    """
+
+    def __init__(self, total_vacancies: int = 60, latency_ms: float = 50, jitter_ms: float = 20,
+                 reveal_ms: float = 150, seed: int = 42, fixtures_dir: str = None):
+        self.total_vacancies = total_vacancies
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.reveal_ms = reveal_ms
+        self.seed = seed
+        self.fixtures_dir = fixtures_dir
+        self.documents = 0  # Отдано HTML-страниц
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def _delay(self):
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def _recorded(self, name: str):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def _handle(self, request):
+        parts = urlsplit(request.path)
+        vacancy_match = re.fullmatch(r"/vacancy/(\d+)", parts.path)
+
+        if parts.path == "/search/vacancy":
+            page = int(parse_qs(parts.query).get("page", ["0"])[0])
+            body = self._recorded(f"serp_{page}.html") or self._serp_page(page)
+        elif vacancy_match:
+            vacancy_id = int(vacancy_match.group(1))
+            body = self._recorded(f"vacancy_{vacancy_id}.html") or self._vacancy_page(vacancy_id)
+        else:
+            request.send_response(204)
+            request.end_headers()
+            return
+
+        self._delay()
+        with self._lock:
+            self.documents += 1
+        payload = body.encode("utf-8")
+        request.send_response(200)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def _serp_page(self, page: int) -> str:
+        ids = vacancy_ids(self.total_vacancies)[page * PER_PAGE:(page + 1) * PER_PAGE]
+        cards = "\n".join(
+            SERP_CARD_TEMPLATE.format(
+                vacancy_id=vacancy_id,
+                company=vacancy_id % 997,
+                city=CITIES[vacancy_id % len(CITIES)],
+                house=vacancy_id % 120 + 1,
+            )
+            for vacancy_id in ids
+        )
+        has_next = (page + 1) * PER_PAGE < self.total_vacancies
+        pager = (
+            f'<a data-qa="pager-next" href="/search/vacancy?text=bench&page={page + 1}">дальше</a>'
+            if has_next else ""
+        )
+        return SERP_TEMPLATE.format(cards=cards, pager=pager)
+
+    def _vacancy_page(self, vacancy_id: int) -> str:
+        # Треть вакансий — телефон сразу, треть — за кнопкой, треть — без контактов
+        phone = f"+7 (9{vacancy_id % 100:02d}) {vacancy_id % 1000:03d}-{vacancy_id % 100:02d}-{(vacancy_id // 7) % 100:02d}"
+        variant = random.Random(self.seed * 1_000_003 + vacancy_id).randrange(3)
+        if variant == 0:
+            contacts = CONTACTS_INLINE.format(phone=phone)
+        elif variant == 1:
+            contacts = CONTACTS_BEHIND_BUTTON.format(phone=phone, reveal_ms=int(self.reveal_ms))
+        else:
+            contacts = CONTACTS_NONE
+        return VACANCY_TEMPLATE.format(
+            vacancy_id=vacancy_id,
+            company=vacancy_id % 997,
+            city=CITIES[vacancy_id % len(CITIES)],
+            contacts=contacts,
+            filler="Описание вакансии. " * 200,
+        )
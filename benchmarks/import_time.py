@@ -0,0 +1,101 @@
+"""
+Время импорта gui.py — страж холодного старта окна.
+
+Каждый замер — отдельный процесс с `python -X importtime -c "import gui"`, берётся медиана.
+Дополнительно проверяется, что тяжёлые модули (pandas, openpyxl, Playwright, парсеры)
+не импортируются вместе с gui: они должны загружаться лениво или в фоне после первого кадра.
+Код возврата 1 — если превышен --max-ms или тяжёлый модуль попал в импорт окна.
+
+Пример:
+    python -m benchmarks.import_time --repeat 5 --max-ms 300 --output import_time.json
+"""
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которых не должно быть в sys.modules сразу после `import gui`
+HEAVY_MODULES = ("pandas", "openpyxl", "playwright", "hh_phone_search", "hh_url_collector", "hh_notice_search")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_once(module: str) -> dict:
+    """Один холодный импорт: суммарное время и накопительное время модулей первых двух уровней"""
+    probe = f"import sys; import {module}; print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} завершился с ошибкой:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2  # -X importtime сдвигает вложенные импорты на 2 пробела
+        if depth == 0:  # Вложенные импорты уже входят в cumulative верхнего уровня
+            total_us += int(cumulative_us)
+        if depth <= 1:
+            cumulative[name] = int(cumulative_us)
+    return {
+        "total_ms": total_us / 1000,
+        "modules_ms": {name: us / 1000 for name, us in cumulative.items()},
+        "heavy_loaded": ast.literal_eval(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Время импорта gui.py")
+    arg_parser.add_argument("--module", default="gui", help="Что импортировать")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Сколько холодных запусков")
+    arg_parser.add_argument("--top", type=int, default=10, help="Сколько самых дорогих импортов показать")
+    arg_parser.add_argument("--max-ms", type=float, help="Порог медианы; выше — код возврата 1")
+    arg_parser.add_argument("--output", help="Файл для JSON (по умолчанию — stdout)")
+    args = arg_parser.parse_args(argv)
+
+    runs = [measure_once(args.module) for _ in range(args.repeat)]
+    totals = [run["total_ms"] for run in runs]
+    median_ms = statistics.median(totals)
+    last = runs[-1]
+    heaviest = sorted(last["modules_ms"].items(), key=lambda item: item[1], reverse=True)[: args.top]
+
+    report = {
+        "module": args.module,
+        "repeat": args.repeat,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "top_imports_ms": {name: round(ms, 1) for name, ms in heaviest},
+        "heavy_loaded": last["heavy_loaded"],
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    failed = False
+    if last["heavy_loaded"]:
+        print(f"Тяжёлые модули импортируются вместе с {args.module}: {', '.join(last['heavy_loaded'])}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"Медиана {median_ms:.0f} мс превышает порог {args.max_ms:.0f} мс")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
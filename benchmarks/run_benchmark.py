@@ -0,0 +1,244 @@
+"""
+Офлайн-бенчмарк парсеров на локальном сервере со страницами в разметке HH.
+
+Запросы к hh.ru внутри браузера перенаправляются на FixtureServer через context_hooks
+BrowserService, поэтому все режимы работают end-to-end без обращения к сайту.
+Результат — JSON: страниц в секунду, перцентили по этапам, пиковая память.
+
+Пример:
+    python -m benchmarks.run_benchmark --mode all --vacancies 60 --latency-ms 80 --output bench.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import openpyxl
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_server import FixtureServer, vacancy_ids
+from Main_HH_files.browser_service import BrowserService
+from Main_HH_files.browser_memory import BrowserMemoryMonitor
+from Main_HH_files.session_store import SessionStore
+from Main_HH_files.run_trace import percentile, read_trace
+
+try:
+    import resource  # Нет в Windows
+except ImportError:
+    resource = None
+
+MODES = ("phone", "notice", "urls")
+HH_URL_PATTERN = re.compile(r"^https?://([a-z0-9-]+\.)?hh\.ru/")
+
+# Этапы, время которых меряется оборачиванием методов парсера: режим -> {этап: метод}.
+# Запись в хранилище идёт в потоке записи — её этап write берётся из трассы запуска
+STAGE_METHODS = {
+    "phone": {"extract": "_HHParse__get_firm_data_from_page"},
+    "notice": {
+        "serp_cards": "get_vacancy_cards_bulk",
+        "vacancy_page": "parse_vacancy_page",
+        "next_page": "go_to_next_page",
+    },
+    "urls": {"serp_links": "_get_links", "next_page": "_go_to_next_page"},
+}
+
+
+def stage_report(durations: list[float]) -> dict:
+    ms = [d * 1000 for d in durations]
+    return {
+        "count": len(ms),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p90_ms": round(percentile(ms, 90), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2),
+    }
+
+
+def python_peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux — КБ, macOS — байты
+    return round(peak / (1_048_576 if sys.platform == "darwin" else 1024), 1)
+
+
+def time_stages(parser, methods: dict, stages: dict):
+    """Подменяет методы экземпляра обёртками, которые копят длительность вызовов по этапам"""
+    for stage, name in methods.items():
+        original = getattr(parser, name)
+
+        async def timed(*args, _original=original, _stage=stage, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await _original(*args, **kwargs)
+            finally:
+                stages[_stage].append(time.perf_counter() - started)
+
+        setattr(parser, name, timed)
+
+
+def route_to_fixtures(server: FixtureServer, stages: dict):
+    """Хук контекста: все запросы к hh.ru уходят на локальный сервер"""
+
+    async def handle(route):
+        request = route.request
+        local_url = HH_URL_PATTERN.sub(server.base_url + "/", request.url)
+        started = time.perf_counter()
+        response = await route.fetch(url=local_url)
+        if request.resource_type == "document":
+            stages["document"].append(time.perf_counter() - started)
+        await route.fulfill(response=response)
+
+    async def hook(context):
+        await context.route(HH_URL_PATTERN, handle)
+
+    return hook
+
+
+async def _no_wait(*args, **kwargs):
+    return None
+
+
+def build_parser(mode: str, args, workdir: str):
+    """Парсер режима, настроенный на рабочую папку бенчмарка"""
+    search_url = "https://hh.ru/search/vacancy?text=bench&page=0"
+    headless = not args.headed
+
+    if mode == "phone":
+        from hh_phone_search import HHParse
+
+        # Входной файл в xlsx — основной формат пользователей
+        input_file = os.path.join(workdir, "urls.xlsx")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["url"])
+        for vid in vacancy_ids(args.vacancies):
+            sheet.append([f"https://hh.ru/vacancy/{vid}"])
+        workbook.save(input_file)
+        parser = HHParse(input_file=input_file, max_num_firm=args.vacancies, gui_works=False, headless=headless)
+        parser.SKIP_SEEN = False
+        # Пустое сохранённое состояние: страницы фикстур отдают шапку авторизованного пользователя, шаг входа пропускается
+        parser.session = SessionStore(os.path.join(workdir, "session.json"))
+        with open(parser.session.path, "w", encoding="utf-8") as f:
+            json.dump({"cookies": [], "origins": []}, f)
+    elif mode == "notice":
+        from hh_notice_search import HHParse
+
+        parser = HHParse(link=search_url, max_num_firm=args.vacancies, headless=headless)
+        parser.SKIP_SEEN = False
+    else:
+        from hh_url_collector import HHVacancyCollector
+
+        parser = HHVacancyCollector(search_url=search_url, max_vacancies=args.vacancies, headless=headless)
+        parser.SKIP_SEEN = False
+
+    if not args.keep_waits and hasattr(parser, "human_sleep"):
+        parser.human_sleep = _no_wait
+    return parser
+
+
+async def run_mode(mode: str, args, server: FixtureServer) -> dict:
+    random.seed(args.seed)
+    stages = defaultdict(list)
+    workdir = tempfile.mkdtemp(prefix=f"hh_bench_{mode}_")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # Хранилище, журналы и xlsx парсеров пишутся в рабочую папку
+    try:
+        parser = build_parser(mode, args, workdir)
+        time_stages(parser, STAGE_METHODS[mode], stages)
+
+        service = BrowserService(headless=not args.headed)
+        service.context_hooks.append(route_to_fixtures(server, stages))
+        async with service:
+            monitor = await BrowserMemoryMonitor(await service.get_browser(), interval=0.5).start()
+            documents_before = server.documents
+            started = time.perf_counter()
+            await parser.parse_main(browser_service=service)
+            wall = time.perf_counter() - started
+            await monitor.stop()
+
+        # Запись партий меряется в самом потоке записи (RunTrace.batch_write), а не постановка в очередь
+        trace = getattr(parser, "trace", None)
+        if trace is not None:
+            for record in read_trace(trace.path):
+                if record.get("kind") == "write":
+                    stages["write"].append(record["ms"] / 1000)
+
+        documents = server.documents - documents_before
+        records = parser.store.count_records(parser.run_id) if parser.run_id else 0
+        parser.store.close()
+    finally:
+        os.chdir(cwd)
+
+    # Пустой прогон не измеряет парсер — такой результат не должен попасть в отчёт
+    if not documents or not records:
+        raise RuntimeError(
+            f"Режим {mode}: пустой прогон (страниц: {documents}, записей: {records}), см. {workdir}"
+        )
+
+    return {
+        "wall_s": round(wall, 3),
+        "documents": documents,
+        "pages_per_sec": round(documents / wall, 3) if wall else None,
+        "records": records,
+        "records_per_sec": round(records / wall, 3) if wall else None,
+        "stages": {stage: stage_report(values) for stage, values in sorted(stages.items()) if values},
+        "browser_peak_rss_mb": round(monitor.peak_rss / 1_048_576, 1) if monitor.peak_rss else None,
+        "workdir": workdir,
+    }
+
+
+async def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Офлайн-бенчмарк парсеров HHParser")
+    arg_parser.add_argument("--mode", choices=MODES + ("all",), default="all")
+    arg_parser.add_argument("--vacancies", type=int, default=60, help="Сколько вакансий обработать в каждом режиме")
+    arg_parser.add_argument("--latency-ms", type=float, default=50, help="Задержка ответа сервера")
+    arg_parser.add_argument("--jitter-ms", type=float, default=20, help="Разброс задержки ±")
+    arg_parser.add_argument("--reveal-ms", type=float, default=150, help="Задержка появления телефона после клика")
+    arg_parser.add_argument("--seed", type=int, default=42)
+    arg_parser.add_argument("--fixtures", help="Папка с записанными serp_<page>.html / vacancy_<id>.html")
+    arg_parser.add_argument("--keep-waits", action="store_true", help="Не отключать человеческие паузы парсеров")
+    arg_parser.add_argument("--headed", action="store_true", help="Запускать браузер с окном")
+    arg_parser.add_argument("--output", help="Файл для JSON (по умолчанию — stdout)")
+    args = arg_parser.parse_args(argv)
+
+    server = FixtureServer(
+        total_vacancies=args.vacancies,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        reveal_ms=args.reveal_ms,
+        seed=args.seed,
+        fixtures_dir=args.fixtures,
+    ).start()
+    try:
+        modes = MODES if args.mode == "all" else (args.mode,)
+        results = {mode: await run_mode(mode, args, server) for mode in modes}
+    finally:
+        server.stop()
+
+    report = {
+        "seed": args.seed,
+        "vacancies": args.vacancies,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "human_waits": args.keep_waits,
+        "python_peak_rss_mb": python_peak_rss_mb(),
+        "modes": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,16 +2,18 @@ import os
 import re
 import sv_ttk
 import shutil
-import datetime
 import subprocess
 import threading
+import importlib
 import webbrowser
-import pandas as pd
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, IntVar, Toplevel, Text
-from hh_phone_search import HHParse
-from hh_url_collector import HHVacancyCollector
 from Main_HH_files.async_runner import AsyncParserRunner
+from Main_HH_files.log_buffer import LogBuffer
+
+# Тяжёлые модули (pandas, openpyxl, Playwright) не нужны для первого кадра окна:
+# они импортируются в фоне после отрисовки, а в обработчиках — по месту использования
+PRELOAD_MODULES = ("pandas", "hh_url_collector", "hh_phone_search")
 
 
 class HHParser(ttk.Frame):
@@ -26,6 +28,12 @@ class HHParser(ttk.Frame):
         except Exception as e:
             print(f"Cannot load icon: {e}")
 
+        # Лог: сообщения копятся в очереди и выводятся пачкой раз в LOG_TICK_MS
+        self.LOG_MAX_LINES = 2000  # Сколько последних строк держать в окне; полный лог — в файле
+        self.LOG_TICK_MS = 150
+        self.log_buffer = LogBuffer()
+        self._thread_status = None  # Последнее сообщение потока парсера для строки состояния
+
         self.interface_style()
         self.pack(fill=tk.BOTH, expand=True)
 
@@ -37,6 +45,28 @@ class HHParser(ttk.Frame):
         self.output_excel = "hh_parse_results/data.xlsx"
         self.url_search_output = "hh_parse_results/hh_url_search_results.xlsx"
 
+        # Один сервис на всё время работы окна: браузер запускается после первого кадра и живёт между запусками
+        self.runner = AsyncParserRunner(update_callback=self.update_gui_from_thread)
+        self.bind("<Map>", self._on_first_map)
+        self.after(self.LOG_TICK_MS, self._drain_log)
+
+    def _on_first_map(self, event=None):
+        self.unbind("<Map>")
+        self.after_idle(self._start_background_warm_up)
+
+    def _start_background_warm_up(self):
+        """После первого кадра: запуск браузера и фоновый импорт модулей парсеров"""
+        self.runner.warm_up(headless=self.headless_var.get())
+        threading.Thread(target=self._preload_modules, name="gui-preload", daemon=True).start()
+
+    @staticmethod
+    def _preload_modules():
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Не удалось заранее загрузить {name}: {e}")
+
     def interface_style(self):
         sv_ttk.set_theme("light")
 
@@ -157,6 +187,12 @@ class HHParser(ttk.Frame):
         )
         self.firm_count_spinbox.grid(row=0, column=1, padx=5, pady=0, sticky=tk.W)
 
+        self.headless_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            common_frame, text="Фоновый режим (без окна браузера)",
+            variable=self.headless_var,
+        ).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+
         row += 1
 
         # 5. Кнопки управления
@@ -304,22 +340,29 @@ class HHParser(ttk.Frame):
             self.status_var.set(f"Файл не найден: {os.path.basename(self.phone_excel_path)}")
             return
 
+        if self.is_parsing or self.runner.is_busy:
+            messagebox.showwarning("Внимание", "Парсинг уже выполняется")
+            return
+
         try:
+            from hh_phone_search import HHParse
+
             self.is_parsing = True
             self.parser_instance = HHParse(
                 input_file=self.phone_excel_path,
                 max_num_firm=self.firm_count_var.get(),
-                gui_works=True
+                gui_works=True,
+                headless=self.headless_var.get(),
             )
 
             self.log_message("Запуск парсинга...")
 
-            runner = AsyncParserRunner(
+            future = self.runner.submit(
                 self.parser_instance,
                 update_callback=self.update_gui_from_thread,
                 completion_callback=self.on_parsing_complete,
             )
-            runner.start()
+            future.add_done_callback(self._on_job_done)
 
         except Exception as e:
             self.log_message(f"Ошибка при запуске парсинга: {str(e)}")
@@ -340,7 +383,7 @@ class HHParser(ttk.Frame):
             messagebox.showwarning("Внимание", "Неверный формат URL.\nПример: https://saratov.hh.ru/search/vacancy?area=1234")
             return
 
-        if self.is_parsing:
+        if self.is_parsing or self.runner.is_busy:
             messagebox.showwarning("Внимание", "Поиск уже выполняется")
             return
 
@@ -351,14 +394,18 @@ class HHParser(ttk.Frame):
         self.log_message(f"Максимальное количество: {max_vacancies}")
         self.status_var.set(f"Сбор вакансий: {max_vacancies} шт.")
 
-        self.parser_instance = HHVacancyCollector(search_url=url, max_vacancies=max_vacancies)
+        from hh_url_collector import HHVacancyCollector
+
+        self.parser_instance = HHVacancyCollector(
+            search_url=url, max_vacancies=max_vacancies, headless=self.headless_var.get()
+        )
 
-        runner = AsyncParserRunner(
+        future = self.runner.submit(
             self.parser_instance,
             update_callback=self.update_gui_from_thread,
             completion_callback=self.on_url_search_complete,
         )
-        runner.start()
+        future.add_done_callback(self._on_job_done)
 
     def on_url_search_complete(self, flag=True):
         """Завершение поиска по URL"""
@@ -390,12 +437,31 @@ class HHParser(ttk.Frame):
                 self.log_message("Парсинг остановлен")
         self.after(0, update)
 
+    def _on_job_done(self, future):
+        """Задание отменено и полностью завершилось (успех и ошибку обрабатывают completion-колбэки)"""
+        if not future.cancelled():
+            return
+
+        def update():
+            self.is_parsing = False
+            self.status_var.set("Парсинг остановлен")
+            self.log_message("Парсинг остановлен, прогресс сохранён")
+        self.after(0, update)
+
     def stop_parsing(self):
         """Остановка парсинга"""
         if not self.is_parsing:
             self.log_message("Ничего не выполняется!")
             return
 
+        # Отменяем задание: парсер закрывает свой контекст и сохраняет прогресс, браузер остаётся тёплым.
+        # is_parsing сбросит _on_job_done, когда задание действительно завершится
+        if self.runner.is_busy:
+            self.runner.cancel()
+            self.status_var.set("Остановка: сохраняем прогресс...")
+            self.log_message("Парсинг остановлен пользователем, сохраняем прогресс...")
+            return
+
         self.is_parsing = False
 
         try:
@@ -418,40 +484,35 @@ class HHParser(ttk.Frame):
         self.log_message("Парсинг остановлен пользователем")
 
     def log_message(self, message, level=None):
-        """Добавление сообщения в лог с цветами"""
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-
-        if level is None:
-            msg_lower = message.lower()
-            error_words = ["ошибка", "error", "closed", "exception", "failed", "прервано"]
-            warning_words = ["предупреждение", "warning", "внимание", "остановлен"]
-            success_words = ["успешно", "success", "завершен", "готово", "успешн"]
-
-            if any(word in msg_lower for word in error_words):
-                level = "ERROR"
-            elif any(word in msg_lower for word in warning_words):
-                level = "WARNING"
-            elif any(word in msg_lower for word in success_words):
-                level = "SUCCESS"
-            else:
-                level = "INFO"
-
-        formatted_message = f"[{timestamp}] [{level}] {message}\n"
-        self.log_text.insert(tk.END, formatted_message, (level,))
-        self.log_text.see(tk.END)
+        """Добавление сообщения в лог с цветами (можно вызывать из любого потока)"""
+        self.log_buffer.put(message, level)
+
+    def _drain_log(self):
+        """Вывод накопленных сообщений одной вставкой и обрезка окна до LOG_MAX_LINES строк"""
+        lines = self.log_buffer.drain(self.LOG_MAX_LINES)
+        if lines:
+            # Text.insert принимает чередующиеся пары (текст, теги) — одна вставка на всю пачку
+            self.log_text.insert(tk.END, *(part for text, level in lines for part in (text, (level,))))
+            line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1  # Последняя строка после \n пустая
+            if line_count > self.LOG_MAX_LINES:
+                self.log_text.delete("1.0", f"{line_count - self.LOG_MAX_LINES + 1}.0")
+            self.log_text.see(tk.END)
+
+        status, self._thread_status = self._thread_status, None
+        if status is not None:
+            self.status_var.set(status[:50] + "..." if len(status) > 50 else status)
+        self.after(self.LOG_TICK_MS, self._drain_log)
 
     def clear_log(self):
-        """Очистка лога"""
+        """Очистка лога (файл лога не трогается)"""
         self.log_text.delete(1.0, tk.END)
         self.log_message("Лог очищен")
         self.status_var.set("Лог очищен")
 
     def update_gui_from_thread(self, message):
-        """Обновление GUI из потока"""
-        def update():
-            self.log_message(message)
-            self.status_var.set(message[:50] + "..." if len(message) > 50 else message)
-        self.after(0, update)
+        """Обновление GUI из потока: сообщение выводится на ближайшем такте _drain_log"""
+        self.log_buffer.put(message)
+        self._thread_status = message
 
     def open_link(self):
         webbrowser.open("https://github.com/itrickon/HHParser")
@@ -578,6 +639,8 @@ class HHParser(ttk.Frame):
             file_ext = os.path.splitext(file_path)[1].lower()
 
             if file_ext in [".xlsx", ".xls"]:
+                import pandas as pd
+
                 df = pd.read_excel(file_path, header=None)
 
                 if df.empty or df.shape[1] == 0:
@@ -606,6 +669,13 @@ class HHParser(ttk.Frame):
 
     def file_to_path(self):
         """Копирование файла в выбранную папку"""
+        # Во время парсинга xlsx ещё не собран — собираем по запросу из накопленных строк
+        if self.is_parsing and hasattr(self.parser_instance, "export_results"):
+            try:
+                self.parser_instance.export_results()
+            except Exception as e:
+                self.log_message(f"Ошибка сборки файла: {str(e)}")
+
         if not os.path.exists(self.output_excel):
             self.log_message("Ошибка экспорта объявлений! Исходный файл не найден.")
             self.status_var.set("Исходный файл не найден.")
@@ -674,6 +744,8 @@ class HHParser(ttk.Frame):
         if messagebox.askyesno("Выход", "Вы уверены, что хотите выйти?"):
             if self.is_parsing:
                 self.stop_parsing()
+            self.runner.shutdown()
+            self.log_buffer.close()
             self.parent.quit()
 
 
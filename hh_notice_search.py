@@ -2,34 +2,105 @@ import os
 import re
 import random
 import asyncio
-import openpyxl
 from typing import List
-from openpyxl import Workbook
+from contextlib import nullcontext
+from hh_url_collector import extract_vacancy_id
+from Main_HH_files.result_store import ResultStore
+from Main_HH_files.background_writer import BackgroundWriter
+from Main_HH_files.seen_index import SeenIndex
+from Main_HH_files.resource_blocker import ResourceBlocker
+from Main_HH_files.browser_service import browser_scope
+from Main_HH_files.browser_memory import BrowserMemoryMonitor
+from Main_HH_files.page_pool import PagePool
+from Main_HH_files.page_waits import wait_ready, click_and_wait_page_change
+from Main_HH_files.selector_registry import SelectorRegistry
+from Main_HH_files.har_archive import HAR_DIR
+from Main_HH_files.run_trace import RunTrace, Span
 from playwright.async_api import (
-    async_playwright,
     Page as AsyncPage,
 )
 
+# Данные всех карточек выдачи за один вызов (вместо ~8 обращений к браузеру на карточку)
+SERP_CARDS_JS = """
+(cards) => cards.map((card) => {
+    const text = (selector) => {
+        const el = card.querySelector(selector);
+        return el ? (el.textContent || "") : null;
+    };
+    const link = card.querySelector('[data-qa="serp-item__title"]');
+    return {
+        vacancy: (text('[data-qa="serp-item__title"]') || "").trim(),
+        company: text('[data-qa="vacancy-serp__vacancy-employer"]') || "",
+        address: text('[data-qa="vacancy-serp__vacancy-address"]'),
+        href: link ? link.getAttribute("href") : null,
+    };
+})
+"""
+
+# Варианты вёрстки: телефон во всплывающем окне контактов и кнопка «Связаться»
+PHONE_SELECTORS = [
+    '[data-qa="vacancy-contacts__phone-number"]',
+    'span[data-qa="vacancy-contacts__phone-number"]',
+    '.magritte-text:has-text("Основной телефон") + .magritte-v-spacing + .magritte-text',
+    'div.magritte-card[style*="border-radius: 24px"] .magritte-text:has-text("+7")',
+]
+# Прочие элементы попапа контактов: у многих вакансий телефона нет, только ФИО, почта или чат
+CONTACT_DETAILS_SELECTOR = (
+    '[data-qa="vacancy-contacts__fio"], [data-qa="vacancy-contacts__email"], '
+    '[data-qa="vacancy-contacts__chat"]'
+)
+CONTACT_BUTTON_SELECTORS = [
+    'button[data-qa="vacancy-serp__vacancy_contacts"]',
+    'a[data-qa="vacancy-contacts-button"]',
+    'button:has-text("Связаться")',
+    'a:has-text("Связаться")',
+]
+
 
 class HHParse:
-    def __init__(self, link: str, max_num_firm: int):
+    def __init__(self, link: str, max_num_firm: int, headless: bool = False):
         self.link = link
         self.max_num_firm = max_num_firm
         self.data_saving = "hh_parse_results/data.xlsx"
         self.list_of_companies = []
-        self.start_row = 2
         self.count_page = 0
-
-        if os.path.exists(self.data_saving):
-            os.remove(self.data_saving)
+        self.store = ResultStore()  # Общее хранилище; data.xlsx — выгрузка текущего запуска
+        self.run_id = None
+        self.bg_writer = None  # Поток записи; создаётся в parse_main
+        self.context = None
+        self.page_pool = None  # Переиспользуемые вкладки для страниц вакансий; создаётся в parse_main
+        self.memory_monitor = None
+        self.har = None  # Подключённый HarArchive; только на время parse_main
+        self.trace = None  # RunTrace запуска; создаётся в parse_main
+        self.HEADLESS = headless  # Фоновый режим без окна браузера (для серверов без дисплея)
 
         # Конфигурация для естественного поведения
         self.PAGE_DELAY_BETWEEN_BATCHES = (1.2, 2.4)
         self.NAV_STAGGER_BETWEEN_TABS = (0.45, 1.0)
-        self.POST_NAV_IDLE = (0.35, 0.7)
         self.CLOSE_STAGGER_BETWEEN_TABS = (0.25, 0.55)
         self.CLICK_DELAY = 1.5
         self.NAV_TIMEOUT = 35000
+        # Сработавший вариант селектора проверяется первым; статистика — в конце запуска
+        self.phone_selectors = SelectorRegistry("Телефон в попапе", PHONE_SELECTORS)
+        self.contact_selectors = SelectorRegistry("Кнопка «Связаться»", CONTACT_BUTTON_SELECTORS)
+        self.READY_TIMEOUT = 5000  # Сколько ждать элемента, означающего готовность (попап, заголовок), мс
+        self.VACANCY_PAGES = 1  # Вкладок в пуле для страниц вакансий (карточки обходятся по одной)
+
+        # HAR: "record" — записать трафик запуска, "replay" — повторить запуск офлайн из записи
+        self.HAR_MODE = None
+        self.HAR_PATH = os.path.join(HAR_DIR, "notice.har")
+
+        # Трасса: по строке на вакансию с длительностью этапов (python -m Main_HH_files.run_trace — сводка)
+        self.TRACE = True
+
+        # Трафик: картинки, шрифты, медиа и аналитика не загружаются
+        self.BLOCK_RESOURCES = True
+        self.resource_blocker = ResourceBlocker()
+
+        # Повторные запуски
+        self.SKIP_SEEN = True  # Пропускать вакансии, собранные в прошлых запусках
+        self.SEEN_TTL_DAYS = 7  # Сколько дней вакансия считается собранной; None = бессрочно
+        self.seen_index = None  # Загружается в parse_main
 
         # Человеческие параметры
         self.HUMAN = {
@@ -46,7 +117,9 @@ class HHParse:
         }
 
     async def human_sleep(self, a: float, b: float):
-        """Случайная задержка между действиями"""
+        """Случайная задержка между действиями; при воспроизведении HAR пауз нет — сеть не используется"""
+        if self.HAR_MODE == "replay":
+            return
         await asyncio.sleep(random.uniform(a, b))
 
     async def human_scroll_jitter(self, page: AsyncPage, count: int = None):
@@ -97,50 +170,53 @@ class HHParse:
         ]
         return random.choice(user_agents)
 
-    async def check_xlsx(self):
-        """Создание Excel файла с заголовками"""
-        os.makedirs("hh_parse_results", exist_ok=True)
-
-        self.wb = Workbook()
-        self.ws = self.wb.active
-
-        headers = ["Вакансия", "Компания", "Город", "Номер"]
-
-        for col, header in enumerate(headers, start=1):
-            self.ws.cell(row=1, column=col, value=header)
-
-        self.wb.save(self.data_saving)
-
     async def data_output_to_xlsx(self, firm_data_list):
-        """Запись данных в Excel"""
-        if os.path.exists(self.data_saving):
-            self.wb = openpyxl.load_workbook(self.data_saving)
-            self.ws = self.wb.active
+        """Передаёт данные потоку записи в хранилище"""
+        if not firm_data_list:
+            return
+        rows = list(firm_data_list)
+        if self.bg_writer is None:
+            self._store_rows(rows)
         else:
-            await self.check_xlsx()
-
-        for firm_data in firm_data_list:
-            for col, value in enumerate(firm_data, start=1):
-                self.ws.cell(row=self.start_row, column=col, value=value)
-            self.start_row += 1
-
-        self.wb.save(self.data_saving)
-        print(f"Записано {len(firm_data_list)} вакансий в файл")
+            await self.bg_writer.submit(rows)
+
+    def _store_rows(self, firm_data_list):
+        """Запись строк [URL, вакансия, компания, город, номер] в хранилище одной транзакцией"""
+        records = [
+            {
+                "vacancy_id": extract_vacancy_id(url),
+                "url": url,
+                "title": vacancy,
+                "company": company,
+                "city": city,
+                "phone": phone,
+            }
+            for url, vacancy, company, city, phone in firm_data_list
+        ]
+        with self.trace.batch_write(len(records)) if self.trace is not None else nullcontext():
+            self.store.add_vacancies(self.run_id, "notice", records)
+            if self.seen_index is not None:
+                self.seen_index.add(record["vacancy_id"] for record in records)
+        print(f"Записано {len(records)} вакансий в хранилище")
+
+    def export_results(self) -> int:
+        """Выгрузка вакансий текущего запуска из хранилища в Excel"""
+        if self.run_id is None:
+            return 0
+        return self.store.export_xlsx("notice", self.data_saving, self.run_id)
 
     async def extract_phone_from_contact_popup(self, page: AsyncPage) -> str:
         """Извлечение телефона из всплывающего окна контактов"""
         try:
-            await self.human_sleep(0.3, 0.6)
-
-            # Основные селекторы для телефона
-            phone_selectors = [
-                '[data-qa="vacancy-contacts__phone-number"]',
-                'span[data-qa="vacancy-contacts__phone-number"]',
-                '.magritte-text:has-text("Основной телефон") + .magritte-v-spacing + .magritte-text',
-                'div.magritte-card[style*="border-radius: 24px"] .magritte-text:has-text("+7")',
-            ]
+            # Ждём наполнения попапа — номера или других контактов; нет номера — обычный итог, не таймаут
+            await wait_ready(
+                page,
+                f"{self.phone_selectors.combined}, {CONTACT_DETAILS_SELECTOR}",
+                self.READY_TIMEOUT,
+                state="visible",
+            )
 
-            for selector in phone_selectors:
+            for attempt, selector in enumerate(self.phone_selectors.ordered()):
                 try:
                     phone_element = await page.query_selector(selector)
                     if phone_element and await phone_element.is_visible():
@@ -149,6 +225,7 @@ class HHParse:
                             # Очищаем номер
                             phone_digits = re.sub(r"\D", "", phone_text)
                             if len(phone_digits) >= 10:
+                                self.phone_selectors.record_hit(selector, attempt)
                                 # Форматируем номер
                                 if (
                                     phone_digits.startswith("7")
@@ -166,6 +243,7 @@ class HHParse:
                 except:
                     continue
 
+            self.phone_selectors.record_miss()
             return "Номер не найден"
 
         except Exception as e:
@@ -175,32 +253,26 @@ class HHParse:
     async def click_contact_button(self, page: AsyncPage) -> bool:
         """Клик по кнопке 'Связаться'"""
         try:
-            contact_selectors = [
-                'button[data-qa="vacancy-serp__vacancy_contacts"]',
-                'a[data-qa="vacancy-contacts-button"]',
-                'button:has-text("Связаться")',
-                'a:has-text("Связаться")',
-            ]
-
-            for selector in contact_selectors:
+            for attempt, selector in enumerate(self.contact_selectors.ordered()):
                 try:
                     contact_button = await page.query_selector(selector)
                     if contact_button and await contact_button.is_visible():
                         await self.human_hover(page, contact_button)
                         await self.human_sleep(0.2, 0.4)
                         await contact_button.click()
-                        await self.human_sleep(0.5, 0.8)
 
-                        # Ждем появления попапа
+                        # Ждем появления попапа (без фиксированной паузы после клика)
                         await page.wait_for_selector(
                             'div[class*="magritte-drop-container"], '
                             '[data-qa="vacancy-contacts__phone"]',
                             timeout=5000,
                         )
+                        self.contact_selectors.record_hit(selector, attempt)
                         return True
                 except:
                     continue
 
+            self.contact_selectors.record_miss()
             return False
 
         except Exception as e:
@@ -211,7 +283,7 @@ class HHParse:
         """Закрытие всплывающего окна"""
         try:
             await page.keyboard.press("Escape")
-            await self.human_sleep(0.3, 0.5)
+            await wait_ready(page, 'div[class*="magritte-drop-container"]', self.READY_TIMEOUT, state="hidden")
         except:
             pass
 
@@ -244,160 +316,133 @@ class HHParse:
 
         return location_text
 
-    async def parse_vacancy_card(self, vacancy_card) -> dict:
-        """Парсинг данных из карточки вакансии без перехода на отдельную страницу"""
+    async def parse_vacancy_page(self, vacancy_url: str, span: Span = None) -> dict:
+        """
+        Парсинг полной страницы вакансии для получения телефона.
+        Args:
+            span: Замеры вакансии для трассы — этапы goto, extract и contacts
+        """
         page_data = {"vacancy": "", "company": "", "city": "", "phone": ""}
+        stage = span.stage if span is not None else lambda name: nullcontext()
 
         try:
-            # Извлекаем данные из карточки
-            # Название вакансии
-            try:
-                title_el = await vacancy_card.query_selector(
-                    '[data-qa="serp-item__title"]'
-                )
-                if title_el:
-                    page_data["vacancy"] = (await title_el.text_content()).strip()
-            except:
-                pass
-
-            # Компания
-            try:
-                company_el = await vacancy_card.query_selector(
-                    '[data-qa="vacancy-serp__vacancy-employer"]'
-                )
-                if company_el:
-                    company_text = await company_el.text_content()
-                    # Очищаем от лишних пробелов
-                    page_data["company"] = " ".join(company_text.split()).strip()
-            except:
-                pass
-
-            # Город
-            try:
-                city_el = await vacancy_card.query_selector(
-                    '[data-qa="vacancy-serp__vacancy-address"]'
-                )
-                if city_el:
-                    city_text = await city_el.text_content()
-                    page_data["city"] = await self.extract_city_from_location(city_text)
-                else:
-                    page_data["city"] = "Не указан"
-            except:
-                page_data["city"] = "Ошибка"
-
-            # Телефон будем получать при переходе на страницу вакансии
-            page_data["phone"] = "Требуется переход"
-
-            return page_data
-
-        except Exception as e:
-            print(f"Ошибка при парсинге карточки: {e}")
-            return page_data
-
-    async def parse_vacancy_page(self, vacancy_url: str) -> dict:
-        """Парсинг полной страницы вакансии для получения телефона"""
-        page_data = {"vacancy": "", "company": "", "city": "", "phone": ""}
+            # Вкладка берётся из пула и возвращается в него при любом исходе
+            async with self.page_pool.page() as vacancy_page:
+                await self.human_sleep(*self.NAV_STAGGER_BETWEEN_TABS)
 
-        try:
-            vacancy_page = await self.context.new_page()
-            await self.human_sleep(*self.NAV_STAGGER_BETWEEN_TABS)
-
-            await vacancy_page.goto(
-                vacancy_url, wait_until="domcontentloaded", timeout=self.NAV_TIMEOUT
-            )
-            await self.human_sleep(*self.POST_NAV_IDLE)
-            await self.human_scroll_jitter(vacancy_page)
-
-            # Название вакансии
-            try:
-                title_el = await vacancy_page.query_selector(
-                    '[data-qa="vacancy-title"]'
-                )
-                if title_el:
-                    page_data["vacancy"] = (await title_el.text_content()).strip()
-            except:
-                pass
-
-            # Компания
-            try:
-                company_el = await vacancy_page.query_selector(
-                    '[data-qa="vacancy-company-name"]'
-                )
-                if company_el:
-                    company_text = await company_el.text_content()
-                    page_data["company"] = " ".join(company_text.split()).strip()
-            except:
-                pass
-
-            # Город
-            try:
-                city_el = await vacancy_page.query_selector(
-                    '[data-qa="vacancy-view-location"]'
-                )
-                if city_el:
-                    city_text = await city_el.text_content()
-                    page_data["city"] = await self.extract_city_from_location(city_text)
-                else:
-                    page_data["city"] = "Не указан"
-            except:
-                page_data["city"] = "Ошибка"
-
-            # Телефон через кнопку "Связаться"
-            try:
-                if await self.click_contact_button(vacancy_page):
-                    page_data["phone"] = await self.extract_phone_from_contact_popup(
-                        vacancy_page
+                with stage("goto"):
+                    await vacancy_page.goto(
+                        vacancy_url, wait_until="domcontentloaded", timeout=self.NAV_TIMEOUT
                     )
-                    await self.close_contact_popup(vacancy_page)
-                else:
-                    page_data["phone"] = "Нет кнопки связи"
-            except Exception as e:
-                print(f"Ошибка при получении телефона: {e}")
-                page_data["phone"] = "Ошибка"
-
-            await self.human_sleep(*self.CLOSE_STAGGER_BETWEEN_TABS)
-            await vacancy_page.close()
+                    await wait_ready(vacancy_page, '[data-qa="vacancy-title"]', self.READY_TIMEOUT)
+                await self.human_scroll_jitter(vacancy_page)
+
+                with stage("extract"):
+                    # Название вакансии
+                    try:
+                        title_el = await vacancy_page.query_selector(
+                            '[data-qa="vacancy-title"]'
+                        )
+                        if title_el:
+                            page_data["vacancy"] = (await title_el.text_content()).strip()
+                    except:
+                        pass
+
+                    # Компания
+                    try:
+                        company_el = await vacancy_page.query_selector(
+                            '[data-qa="vacancy-company-name"]'
+                        )
+                        if company_el:
+                            company_text = await company_el.text_content()
+                            page_data["company"] = " ".join(company_text.split()).strip()
+                    except:
+                        pass
+
+                    # Город
+                    try:
+                        city_el = await vacancy_page.query_selector(
+                            '[data-qa="vacancy-view-location"]'
+                        )
+                        if city_el:
+                            city_text = await city_el.text_content()
+                            page_data["city"] = await self.extract_city_from_location(city_text)
+                        else:
+                            page_data["city"] = "Не указан"
+                    except:
+                        page_data["city"] = "Ошибка"
+
+                with stage("contacts"):
+                    # Телефон через кнопку "Связаться"
+                    try:
+                        if await self.click_contact_button(vacancy_page):
+                            page_data["phone"] = await self.extract_phone_from_contact_popup(
+                                vacancy_page
+                            )
+                            await self.close_contact_popup(vacancy_page)
+                        else:
+                            page_data["phone"] = "Нет кнопки связи"
+                    except Exception as e:
+                        print(f"Ошибка при получении телефона: {e}")
+                        page_data["phone"] = "Ошибка"
 
             return page_data
 
         except Exception as e:
             print(f"Ошибка при парсинге страницы вакансии {vacancy_url}: {e}")
-            await vacancy_page.close()
             return page_data
 
-    async def get_vacancy_cards(self) -> List:
-        """Получение всех карточек вакансий на странице"""
+    @staticmethod
+    def _vacancy_outcome(page_data: dict) -> str:
+        """Итог вакансии для трассы по результату parse_vacancy_page"""
+        if not page_data["vacancy"] or page_data["phone"] in ("", "Ошибка"):
+            return "error"
+        if page_data["phone"] in ("Нет кнопки связи", "Номер не найден"):
+            return "no_contacts"
+        return "success"
+
+    async def get_vacancy_cards_bulk(self) -> List[dict]:
+        """
+        Получение данных всех карточек на странице одним вызовом evaluate.
+        Return: Записи {"vacancy", "company", "city", "phone", "url"}; город уже очищен
+        """
         try:
-            # Все объявления имеют data-qa="vacancy-serp__vacancy"
-            vacancy_cards = await self.page.query_selector_all(
-                '[data-qa="vacancy-serp__vacancy"]'
+            raw_cards = await self.page.eval_on_selector_all(
+                '[data-qa="vacancy-serp__vacancy"]', SERP_CARDS_JS
             )
-            print(f"Найдено карточек вакансий: {len(vacancy_cards)}")
-            return vacancy_cards[
-                : min(20, self.max_num_firm - len(self.list_of_companies))
-            ]
         except Exception as e:
             print(f"Ошибка при поиске карточек: {e}")
             return []
 
-    async def get_vacancy_url_from_card(self, vacancy_card):
-        """Получение ссылки на вакансию из карточки"""
-        try:
-            # Ищем ссылку в карточке
-            link_el = await vacancy_card.query_selector('[data-qa="serp-item__title"]')
-            if link_el:
-                href = await link_el.get_attribute("href")
-                if href:
-                    # Убираем параметры отслеживания
-                    clean_href = href.split("?")[0] if "?" in href else href
-                    if clean_href.startswith("http"):
-                        return clean_href
-                    else:
-                        return f"https://hh.ru{clean_href}"
-        except Exception as e:
-            print(f"Ошибка при получении ссылки: {e}")
+        print(f"Найдено карточек вакансий: {len(raw_cards)}")
+        raw_cards = raw_cards[: min(20, self.max_num_firm - len(self.list_of_companies))]
+
+        cards = []
+        for raw in raw_cards:
+            cards.append(
+                {
+                    "vacancy": raw["vacancy"],
+                    "company": " ".join(raw["company"].split()).strip(),
+                    "city": (
+                        await self.extract_city_from_location(raw["address"])
+                        if raw["address"] is not None
+                        else "Не указан"
+                    ),
+                    # Телефон будем получать при переходе на страницу вакансии
+                    "phone": "Требуется переход",
+                    "url": self._clean_vacancy_href(raw["href"]),
+                }
+            )
+        return cards
 
-        return None
+    def _clean_vacancy_href(self, href):
+        """Убирает параметры отслеживания и дополняет относительную ссылку до полной"""
+        if not href:
+            return None
+        clean_href = href.split("?")[0] if "?" in href else href
+        if clean_href.startswith("http"):
+            return clean_href
+        return f"https://hh.ru{clean_href}"
 
     async def go_to_next_page(self) -> bool:
         """Переход на следующую страницу результатов"""
@@ -419,12 +464,12 @@ class HHParse:
             await self.human_sleep(0.2, 0.4)
 
             print("Переходим на следующую страницу...")
-            await next_button.click()
-            await self.human_sleep(0.2, 0.7)
-
-            # Ждем загрузки
-            await self.page.wait_for_load_state("domcontentloaded", timeout=10000)
-            await self.human_sleep(0.2, 0.5)
+            # Ждём смены страницы и появления карточек вместо фиксированных пауз
+            if not await click_and_wait_page_change(
+                self.page, next_button, '[data-qa="vacancy-serp__vacancy"]', self.NAV_TIMEOUT
+            ):
+                print("Следующая страница не загрузилась")
+                return False
 
             # Скроллим
             await self.human_scroll_jitter(self.page)
@@ -438,15 +483,23 @@ class HHParse:
             print(f"Ошибка при переходе на следующую страницу: {e}")
             return False
 
-    async def parse_main(self, update_callback=None):
-        """Основная функция парсинга"""
-        async with async_playwright() as playwright:
+    async def parse_main(self, update_callback=None, browser_service=None):
+        """
+        Основная функция парсинга.
+        Args:
+            browser_service: Общий BrowserService с тёплым браузером; None — запустить свой на время парсинга
+        """
+        run_status = "failed"  # Итог запуска в хранилище; "completed" — только если дошли до конца
+        async with browser_scope(browser_service, headless=self.HEADLESS) as service:
             try:
-                browser = await playwright.chromium.launch(headless=False)
+                browser = await service.get_browser(headless=self.HEADLESS)
+                self.memory_monitor = await BrowserMemoryMonitor(browser).start()
+                if self.HAR_MODE:
+                    self.har = service.add_har(self.HAR_PATH, self.HAR_MODE)
                 vp_w = random.randint(1200, 1400)
                 vp_h = random.randint(760, 900)
 
-                self.context = await browser.new_context(
+                self.context = await service.new_context(
                     viewport={"width": vp_w, "height": vp_h},
                     user_agent=self.get_random_user_agent(),
                     locale="ru-RU",
@@ -454,13 +507,21 @@ class HHParse:
                     extra_http_headers={"Cache-Control": "no-cache"},
                 )
 
+                if self.BLOCK_RESOURCES:
+                    await self.resource_blocker.install(self.context)
+                self.page_pool = PagePool(self.context, size=self.VACANCY_PAGES)
+
                 self.page = await self.context.new_page()
                 await self.page.goto(
                     self.link, wait_until="domcontentloaded", timeout=self.NAV_TIMEOUT
                 )
 
                 await self.human_scroll_jitter(self.page)
-                await self.check_xlsx()
+                self.run_id = self.store.start_run("notice", self.link)
+                self.trace = RunTrace("notice", self.run_id) if self.TRACE else None
+                # HAR-запуск повторяется один в один: индекс собранных вакансий не читается и не пополняется
+                self.seen_index = None if self.HAR_MODE else SeenIndex(ttl_days=self.SEEN_TTL_DAYS)
+                self.bg_writer = BackgroundWriter(self._store_rows).start()
 
                 page_num = 1
                 processed_count = 0
@@ -469,34 +530,44 @@ class HHParse:
                     print(f"\nСтраница: {page_num}")
                     print(f"Собрано: {len(self.list_of_companies)}/{self.max_num_firm}")
 
-                    # Получаем все карточки вакансий на странице
-                    vacancy_cards = await self.get_vacancy_cards()
+                    # Получаем данные всех карточек страницы одним вызовом
+                    vacancy_cards = await self.get_vacancy_cards_bulk()
 
                     if not vacancy_cards:
                         print("Не найдено карточек вакансий на странице")
                         break
 
                     # Обрабатываем каждую карточку
-                    for card in vacancy_cards:
+                    for basic_data in vacancy_cards:
                         if len(self.list_of_companies) >= self.max_num_firm:
                             break
 
                         processed_count += 1
                         print(f"\n[#{processed_count}] Парсим карточку...")
 
-                        # Сначала получаем базовые данные из карточки
-                        basic_data = await self.parse_vacancy_card(card)
-
                         if not basic_data["vacancy"]:
                             print("Пропускаем - нет названия вакансии")
                             continue
 
-                        # Получаем ссылку для перехода за телефоном
-                        vacancy_url = await self.get_vacancy_url_from_card(card)
+                        # Ссылка для перехода за телефоном
+                        vacancy_url = basic_data["url"]
+
+                        # Собранные в прошлых запусках вакансии не открываем
+                        if (
+                            self.SKIP_SEEN
+                            and self.seen_index is not None
+                            and vacancy_url
+                            and extract_vacancy_id(vacancy_url) in self.seen_index
+                        ):
+                            print("Пропускаем - вакансия уже собрана ранее")
+                            continue
 
                         if vacancy_url:
                             print(f"Переходим за телефоном: {vacancy_url[:80]}...")
-                            full_data = await self.parse_vacancy_page(vacancy_url)
+                            span = Span(vacancy_url)
+                            full_data = await self.parse_vacancy_page(vacancy_url, span)
+                            if self.trace is not None:
+                                self.trace.finish(span, self._vacancy_outcome(full_data))
 
                             # Объединяем данные (предпочитаем данные со страницы)
                             if full_data["vacancy"]:
@@ -513,6 +584,7 @@ class HHParse:
 
                         # Формируем финальные данные
                         firm_data = [
+                            vacancy_url,
                             basic_data["vacancy"],
                             basic_data["company"],
                             basic_data["city"],
@@ -558,16 +630,19 @@ class HHParse:
                 if self.list_of_companies:
                     await self.data_output_to_xlsx(self.list_of_companies)
 
-                await browser.close()
-
-                # Загружаем финальный файл для подсчета
-                if os.path.exists(self.data_saving):
-                    self.wb = openpyxl.load_workbook(self.data_saving)
-                    self.ws = self.wb.active
-                    total_records = self.ws.max_row - 1
-                    print(f"ПАРСИНГ ЗАВЕРШЕН!")
-                    print(f"Всего собрано вакансий: {total_records}")
-                    print(f"Файл сохранен: {self.data_saving}")
+                run_status = "completed"
+                if self.BLOCK_RESOURCES:
+                    print(self.resource_blocker.summary())
+                    if update_callback:
+                        update_callback(self.resource_blocker.summary())
+                for registry in (self.contact_selectors, self.phone_selectors):
+                    print(registry.summary())
+                    if update_callback:
+                        update_callback(registry.summary())
+
+            except asyncio.CancelledError:
+                run_status = "interrupted"
+                raise
 
             except Exception as e:
                 error_msg = f"Произошла ошибка: {e}"
@@ -576,12 +651,54 @@ class HHParse:
                     update_callback(error_msg)
                 raise
 
+            finally:
+                if self.page_pool is not None:
+                    await self.page_pool.close()
+                # Общий браузер остаётся открытым — закрываем только свой контекст
+                if self.context is not None:
+                    try:
+                        await self.context.close()
+                    except Exception:
+                        pass
+                # Дописываем очередь записи и при ошибке/отмене
+                if self.bg_writer is not None:
+                    await self.bg_writer.close()
+                if self.seen_index is not None:
+                    self.seen_index.save()
+                # Итог и Excel — при любом завершении: собранное до ошибки или отмены тоже выгружается
+                if self.run_id is not None:
+                    self.store.finish_run(self.run_id, run_status)
+                    try:
+                        # Excel — выгрузка из хранилища; количество берём из него же
+                        await asyncio.to_thread(self.export_results)
+                        total_records = self.store.count_records(self.run_id)
+                        if run_status == "completed":
+                            print(f"ПАРСИНГ ЗАВЕРШЕН!")
+                        print(f"Всего собрано вакансий: {total_records}")
+                        print(f"Файл сохранен: {self.data_saving}")
+                    except Exception as e:
+                        print(f"Ошибка экспорта в Excel: {e}")
+                if self.memory_monitor is not None:
+                    memory_summary = await self.memory_monitor.stop()
+                    print(memory_summary)
+                    if update_callback:
+                        update_callback(memory_summary)
+                if self.har is not None:
+                    service.remove_hook(self.har)
+                    self.har = None
+                    print(f"HAR ({self.HAR_MODE}): {self.HAR_PATH}")
+                if self.trace is not None:
+                    self.trace.close()
+                    print(f"Трасса запуска: {self.trace.path}")
+
 
 async def main():
     parser = HHParse(
         link="https://hh.ru/search/vacancy?text=python+разработчик&area=1",
         max_num_firm=20,  # Сколько вакансий собрать
+        headless=False,  # True — без окна браузера
     )
+    # parser.HAR_MODE = "record"  # Записать трафик; "replay" — повторить запуск без сети
     await parser.parse_main()
 
 
@@ -1,18 +1,89 @@
 import os
 import re
+import time
+import heapq
 import random
 import asyncio
+import openpyxl
+from contextlib import nullcontext
 import pandas as pd
+from itertools import islice
+from collections import deque, Counter
 from pathlib import Path
+from hh_url_collector import extract_vacancy_id
+from Main_HH_files.result_store import ResultStore
+from Main_HH_files.run_journal import RunJournal
+from Main_HH_files.seen_index import SeenIndex
+from Main_HH_files.resource_blocker import ResourceBlocker
+from Main_HH_files.background_writer import BackgroundWriter
+from Main_HH_files.browser_service import browser_scope
+from Main_HH_files.browser_memory import BrowserMemoryMonitor, browser_rss, page_js_heap, format_mb
+from Main_HH_files.browser_supervisor import BrowserSupervisor, is_browser_gone_error
+from Main_HH_files.page_waits import wait_ready
+from Main_HH_files.har_archive import HAR_DIR
+from Main_HH_files.run_trace import RunTrace, Span
+from Main_HH_files.session_store import SessionStore
 from playwright.async_api import (
-    async_playwright,
     Page as AsyncPage,
     TimeoutError as PWTimeoutError,
 )
 
+# Итог обработки одной ссылки
+OUTCOME_SUCCESS = "success"
+OUTCOME_NO_CONTACTS = "no_contacts"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_NAV_ERROR = "nav_error"
+OUTCOME_ERROR = "error"  # Страница открылась, но извлечение данных упало
+
+OUTCOME_LABELS = {
+    OUTCOME_SUCCESS: "успешно",
+    OUTCOME_NO_CONTACTS: "без контактов",
+    OUTCOME_TIMEOUT: "таймаут",
+    OUTCOME_NAV_ERROR: "ошибка перехода",
+    OUTCOME_ERROR: "ошибка обработки",
+}
+
+CONTACT_BUTTON_SELECTOR = 'button[data-qa="show-employer-contacts show-employer-contacts_top-button"]'
+PHONE_BLOCK_SELECTOR = 'div[data-qa="vacancy-contacts__phone"]'
+PHONE_NUMBER_SELECTOR = 'span[data-qa="vacancy-contacts__phone-number"]'
+# Любой из элементов блока контактов: у многих вакансий телефона нет, только ФИО, почта или чат
+CONTACTS_READY_SELECTOR = ", ".join(
+    [
+        PHONE_NUMBER_SELECTOR,
+        PHONE_BLOCK_SELECTOR,
+        'div[data-qa="vacancy-contacts__fio"]',
+        '[data-qa="vacancy-contacts__email"]',
+    ]
+)
+
+FIRM_DATA_SELECTORS = {
+    "contactButton": CONTACT_BUTTON_SELECTOR,
+    "phoneBlock": PHONE_BLOCK_SELECTOR,
+    "phoneNumber": PHONE_NUMBER_SELECTOR,
+}
+
+# Извлечение всех полей вакансии за один round-trip к браузеру
+FIRM_DATA_JS = """
+(sel) => {
+    const text = (selector) => {
+        const el = document.querySelector(selector);
+        const value = el ? (el.textContent || "").trim() : "";
+        return value || null;
+    };
+    return {
+        title: text('[data-qa="vacancy-title"]'),
+        company: text('[data-qa="vacancy-company-name"] span'),
+        fio: text('div[data-qa="vacancy-contacts__fio"]'),
+        phone: text(sel.phoneNumber),
+        hasContactButton: !!document.querySelector(sel.contactButton),
+        hasPhoneBlock: !!document.querySelector(sel.phoneBlock),
+    };
+}
+"""
+
 
 class HHParse:
-    def __init__(self, input_file: str, max_num_firm: int, gui_works: bool):
+    def __init__(self, input_file: str, max_num_firm: int, gui_works: bool, headless: bool = False):
 
         self.gui_works = gui_works
         self.enter_event = asyncio.Event() if gui_works else None
@@ -21,9 +92,20 @@ class HHParse:
         self.input_file = Path(input_file)
         self.max_num_firm = max_num_firm
         self.data_saving = "hh_parse_results/data.xlsx"
+        self.store = ResultStore()  # Общее хранилище; data.xlsx — выгрузка текущего запуска
+        self.run_id = None
+        self.context = None  # Текущий контекст браузера (может пересоздаваться во время запуска)
+        self.context_options = {}  # Параметры new_context: при пересоздании отпечаток браузера не меняется
+        self.session_state = None  # Состояние авторизованного контекста — для контекстов после перезапуска
+        self.supervisor = None  # Перезапуск упавшего браузера; создаётся в parse_main
+        self.browser_service = None  # BrowserService текущего запуска; задаётся в parse_main
+        self.journal = None  # Журнал для продолжения прерванного запуска; создаётся в parse_main
+        self.bg_writer = None  # Поток записи; создаётся в parse_main
         self.warning_message()
         # Получаем данные фирмы для каждого URL в партии
         self.batch_results = []
+        # ID вакансий партии, обработка которых завершена (попадут в журнал вместе с данными)
+        self.batch_done_ids = []
         # БАЗОВЫЕ ТАЙМАУТЫ
         self.CONCURRENCY = 3  #                            Количество одновременно открытых вкладок браузера (2–3 оптимально)
         self.BATCH_CONCURRENCY_JITTER = True #             Иногда работаем 2 вкладками вместо 3 для естественности
@@ -31,13 +113,51 @@ class HHParse:
         self.POST_NAV_IDLE = (0.35, 0.5)  #                Небольшая «заминка» после загрузки страницы перед действиями
         self.PAGE_DELAY_BETWEEN_BATCHES = (0.2, 0.4,)  #   Пауза между партиями ссылок (раньше была (2.0, 4.0))
         self.CLOSE_STAGGER_BETWEEN_TABS = (0.15, 0.25,)  # Вкладки закрываем с небольшой случайной паузой
-
-        if os.path.exists(self.data_saving):
-            os.remove(self.data_saving)
+        self.READY_TIMEOUT = 4000  #                     Сколько ждать появления контактов после клика, мс
+
+        # ПАМЯТЬ НА ДЛИННЫХ ЗАПУСКАХ: вкладки и контекст периодически пересоздаются
+        self.RECYCLE_PAGE_AFTER = 150  #      Пересоздать вкладку после N переходов
+        self.RECYCLE_HEAP_MB = 200  #         ...или когда её JS-куча больше порога (None — не проверять)
+        self.HEAP_CHECK_EVERY = 25  #         Проверять кучу вкладки раз в N переходов
+        self.RECYCLE_CONTEXT_AFTER = 1500  #  Пересоздать весь контекст после N переходов (None — никогда)
+        self.recycle_stats = {"pages": 0, "contexts": 0}
+        self.MAX_BROWSER_RESTARTS = 3  #      Сколько раз за запуск поднимать упавший браузер, потом — остановка
+
+        # ПОВТОРЫ: ссылки с таймаутом откладываются и повторяются позже с нарастающей паузой
+        self.TIMEOUT_RETRIES = 2  #           Сколько раз повторять ссылку после таймаута
+        self.RETRY_BACKOFF = 20.0  #          Пауза перед первым повтором, с; дальше удваивается
+        self.outcomes = Counter()  #          Итоги по ссылкам за запуск (OUTCOME_*)
+        self.retried = 0  #                   Сколько повторов после таймаута выполнено
+
+        # ТРАССА: по строке на ссылку с длительностью этапов (python -m Main_HH_files.run_trace — сводка)
+        self.TRACE = True
+        self.trace = None  # RunTrace запуска; создаётся в parse_main
+
+        # ТРАФИК: картинки, шрифты, медиа и аналитика не загружаются (после шага входа)
+        self.BLOCK_RESOURCES = True
+        self.resource_blocker = ResourceBlocker()  # Типы/адреса настраиваются через block_types и block_patterns
+
+        # РЕЖИМ БРАУЗЕРА
+        self.HEADLESS = headless  # Фоновый режим без окна (нужна сохранённая сессия: войти в нём нельзя)
+
+        # HAR: "record" — записать трафик запуска, "replay" — повторить запуск офлайн из записи
+        self.HAR_MODE = None
+        self.HAR_PATH = os.path.join(HAR_DIR, "phone.har")
+
+        # СЕССИЯ: после ручного входа состояние сохраняется и подставляется в следующие запуски
+        self.REUSE_SESSION = True
+        self.session = SessionStore()  # Путь и срок годности файла — path и max_age_days
+
+        # ПОВТОРНЫЕ ЗАПУСКИ
+        self.SKIP_SEEN = True  #   Пропускать вакансии, собранные в прошлых запусках (до перехода на страницу)
+        self.SEEN_TTL_DAYS = 7  #  Сколько дней вакансия считается собранной; None = бессрочно
+        self.seen_index = None  #  Индекс собранных вакансий; загружается в parse_main
 
         # ВХОДНОЙ ФАЙЛ С ССЫЛКАМИ
         self.INPUT_SHEET = None  # Имя листа в Excel; None = использовать все листы
         self.URL_COLUMN = None  #  Имя колонки со ссылками; None = искать ссылки во всех колонках
+        self.INPUT_CHUNK_ROWS = 5000  # Размер блока строк при потоковом чтении входного файла
+        self.input_stats = {"found": 0, "duplicates": 0}  # Итоги чтения входного файла
 
         # ЧЕЛОВЕЧНОСТЬ / АНТИБАН-ПОВЕДЕНИЕ
         self.HUMAN = {
@@ -48,7 +168,10 @@ class HHParse:
         """
         Приостанавливает выполнение на случайное количество секунд в диапазоне [a, b].
         Используется для имитации человеческих пауз и предотвращения блокировок!
+        При воспроизведении HAR пауз нет: сеть не используется, блокировать некому.
         """
+        if self.HAR_MODE == "replay":
+            return
         await asyncio.sleep(random.uniform(a, b))
 
     async def press_and_rel(self):
@@ -73,84 +196,179 @@ class HHParse:
         if self.gui_works and hasattr(self, "enter_event"):
             self.enter_event.set()
 
-    def read_urls_from_excel_or_csv(self, sheet=None, url_column=None) -> list[str]:
+    def _iter_input_chunks(self, sheet=None):
         """
-        Читает URL вакансий с hh.ru из Excel или CSV файла.
-        Args:
-            sheet: Имя листа Excel (None для всех листов)
-            url_column: Имя колонки с URL (None для поиска во всех колонках)
-        Return: Список URL вакансий hh.ru
+        Читает входной файл блоками по INPUT_CHUNK_ROWS строк, не загружая его целиком.
+        xlsx — построчно через openpyxl (read_only), csv/txt — чанками pandas.
+        Yields: DataFrame блока; колонки — заголовки из первой строки (если в ней нет ссылки)
         """
-        if not self.input_file.exists():
-            raise FileNotFoundError(f"Файл не найден: {self.input_file}")
-
-        # Регулярное выражение для поиска URL hh.ru
-        url_re = re.compile(r"https?://(?:[a-z]+\.)?hh\.ru/vacancy/\d+")
-        urls: list[str] = []
+        suffix = self.input_file.suffix.lower()
+        chunk_rows = self.INPUT_CHUNK_ROWS
 
-        if self.input_file.suffix.lower() in {".xlsx", ".xls"}:
+        if suffix == ".xlsx":
+            wb = openpyxl.load_workbook(self.input_file, read_only=True, data_only=True)
+            try:
+                sheets = [sheet] if sheet is not None else wb.sheetnames
+                for sh in sheets:
+                    rows = wb[sh].iter_rows(values_only=True)
+                    header = next(rows, None)
+                    if header is None:
+                        continue
+                    columns = [
+                        str(name) if name is not None else f"Unnamed: {i}"
+                        for i, name in enumerate(header)
+                    ]
+                    block = []
+                    for row in rows:
+                        # В read_only режиме строки могут быть короче/длиннее шапки
+                        block.append((tuple(row) + (None,) * len(columns))[: len(columns)])
+                        if len(block) >= chunk_rows:
+                            yield pd.DataFrame(block, columns=columns, dtype=str)
+                            block = []
+                    if block:
+                        yield pd.DataFrame(block, columns=columns, dtype=str)
+            finally:
+                wb.close()
+        elif suffix == ".xls":
+            # Старый формат openpyxl не читает — остаётся pandas, но отдаём так же блоками
             xls = pd.ExcelFile(self.input_file)
             sheets = [sheet] if sheet is not None else xls.sheet_names
             for sh in sheets:
                 df = xls.parse(sh, dtype=str)
-                if url_column and url_column in df.columns:
-                    col = df[url_column].dropna().astype(str)
-                    urls.extend(col.tolist())
-                else:
-                    for col in df.columns:
-                        s = df[col].dropna().astype(str)
-                        for val in s:
-                            urls.extend(url_re.findall(val))
-        elif self.input_file.suffix.lower() in {".csv", ".txt"}:
-            df = pd.read_csv(self.input_file, dtype=str, sep=None, engine="python")
-            if url_column and url_column in df.columns:
-                col = df[url_column].dropna().astype(str)
-                urls.extend(col.tolist())
-            else:
-                for col in df.columns:
-                    s = df[col].dropna().astype(str)
-                    for val in s:
-                        urls.extend(url_re.findall(val))
+                for start in range(0, len(df), chunk_rows):
+                    yield df.iloc[start : start + chunk_rows]
+        elif suffix in {".csv", ".txt"}:
+            with open(self.input_file, encoding="utf-8-sig") as f:
+                first_line = next((line.strip() for line in f if line.strip()), "")
+            # Первая строка со ссылкой — это данные, а не заголовок
+            header = None if re.search(r"https?://", first_line) else 0
+            if not any(sep in first_line for sep in ",;\t|"):
+                # Одна колонка (ссылка на строку): сниффер разделителя на ней ошибается — читаем строками
+                with open(self.input_file, encoding="utf-8-sig") as f:
+                    lines = (line.strip() for line in f)
+                    lines = (line for line in lines if line)
+                    columns = ["url"] if header is None else [next(lines, "url")]
+                    while block := list(islice(lines, chunk_rows)):
+                        yield pd.DataFrame(block, columns=columns, dtype=str)
+                return
+            with pd.read_csv(
+                self.input_file, dtype=str, sep=None, engine="python", header=header, chunksize=chunk_rows
+            ) as reader:
+                yield from reader
         else:
             raise ValueError(f"Неподдерживаемый формат файла: {self.input_file.suffix}")
 
+    def iter_urls_from_excel_or_csv(self, sheet=None, url_column=None):
+        """
+        Лениво выдаёт уникальные URL вакансий hh.ru из Excel или CSV файла.
+        Ссылки извлекаются векторно по целому блоку, приводятся к виду https://hh.ru/vacancy/<id>
+        и дедуплицируются по ID (saratov.hh.ru/vacancy/1 и hh.ru/vacancy/1 — одна вакансия).
+        Args:
+            sheet: Имя листа Excel (None для всех листов)
+            url_column: Имя колонки с URL (None для поиска во всех колонках)
+        Yields: Канонический URL вакансии, каждый ID один раз
+        """
+        if not self.input_file.exists():
+            raise FileNotFoundError(f"Файл не найден: {self.input_file}")
+
+        # Регулярное выражение для поиска URL hh.ru; группа — ID вакансии
+        url_re = r"https?://(?:[a-z]+\.)?hh\.ru/vacancy/(\d+)"
+        seen: set[str] = set()
+        self.input_stats = {"found": 0, "duplicates": 0}
+
+        for chunk in self._iter_input_chunks(sheet):
+            if url_column and url_column in chunk.columns:
+                chunk = chunk[[url_column]]
+
+            # Все ячейки блока построчно в одну Series — одно extractall вместо цикла по ячейкам
+            cells = pd.Series(chunk.to_numpy().ravel()).dropna().astype(str)
+            ids = cells.str.extractall(url_re)[0]
+            if ids.empty:
+                continue
+
+            unique_ids = ids.drop_duplicates()
+            self.input_stats["found"] += len(ids)
+            self.input_stats["duplicates"] += len(ids) - len(unique_ids)
+
+            for vacancy_id in unique_ids:
+                if vacancy_id in seen:
+                    self.input_stats["duplicates"] += 1
+                    continue
+                seen.add(vacancy_id)
+                yield f"https://hh.ru/vacancy/{vacancy_id}"
+
+    def read_urls_from_excel_or_csv(self, sheet=None, url_column=None, limit=None) -> list[str]:
+        """
+        Читает URL вакансий с hh.ru из Excel или CSV файла.
+        Args:
+            sheet: Имя листа Excel (None для всех листов)
+            url_column: Имя колонки с URL (None для поиска во всех колонках)
+            limit: Сколько уникальных URL нужно; чтение файла прекращается, как только они найдены
+        Return: Список канонических URL вакансий hh.ru без повторов
+        """
+        urls = list(islice(self.iter_urls_from_excel_or_csv(sheet, url_column), limit))
         print(f"Прочитано {len(urls)} URL из файла: {self.input_file.name}")
+        if self.input_stats["duplicates"]:
+            print(
+                f"Удалено дубликатов: {self.input_stats['duplicates']} "
+                f"(из {self.input_stats['found']} найденных ссылок, сравнение по ID вакансии)"
+            )
         return urls
 
-    async def data_output_to_xlsx(self, get_firm_data):
-        """Быстрое сохранение в Excel"""
-        if not get_firm_data:
+    async def data_output_to_xlsx(self, get_firm_data, done_ids=None):
+        """
+        Передаёт партию потоку записи в хранилище (xlsx собирается в export_results).
+        Args:
+            get_firm_data: Строки [URL, вакансия, компания, телефон, ФИО]
+            done_ids: ID обработанных вакансий партии — отмечаются в журнале после записи строк
+        """
+        if not get_firm_data and not done_ids:
             return
-        
+
+        batch = (list(get_firm_data), list(done_ids or []))
         try:
-            # Создаем директорию, если её нет
-            os.makedirs(os.path.dirname(self.data_saving), exist_ok=True)
-            
-            new_df = pd.DataFrame(
-                get_firm_data,
-                columns=["URL", "Название вакансии", "Название компании", "Телефон", "ФИО"],
-            )
-            
-            # Если файл не существует - создаем
-            if not os.path.exists(self.data_saving):
-                new_df.to_excel(self.data_saving, index=False)
-                print(f"Создан файл: {len(get_firm_data)} записей")
-                return
-            
-            # Если файл существует - добавляем строки
-            try:
-                # Читаем существующий файл
-                existing_df = pd.read_excel(self.data_saving)
-                
-                # Объединяем и сохраняем (быстро)
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                combined_df.to_excel(self.data_saving, index=False)
-                
-            except Exception as e:
-                print(f"Ошибка сохранения: {e}")
-                
+            if self.bg_writer is None:
+                self._write_batch(batch)
+            else:
+                await self.bg_writer.submit(batch)
+            print(f"Передано на запись: {len(batch[0])} записей")
         except Exception as e:
-            print(f"Ошибка: {e}")
+            print(f"Ошибка сохранения: {e}")
+
+    def _write_batch(self, batch):
+        """Записывает партию в хранилище, затем фиксирует её в журнале (выполняется в потоке записи)"""
+        rows, done_ids = batch
+        with self.trace.batch_write(len(rows)) if self.trace is not None else nullcontext():
+            self._store_rows(rows)
+            if self.journal is not None:
+                self.journal.record(done_ids)
+            if self.seen_index is not None:
+                self.seen_index.add(done_ids)
+
+    def _store_rows(self, rows):
+        """Записывает строки [URL, вакансия, компания, телефон, ФИО] в хранилище одной транзакцией"""
+        if not rows:
+            return
+        records = [
+            {
+                "vacancy_id": extract_vacancy_id(url),
+                "url": url,
+                "title": title,
+                "company": company,
+                "phone": phone,
+                "fio": fio,
+            }
+            for url, title, company, phone, fio in rows
+        ]
+        self.store.add_vacancies(self.run_id, "phone", records)
+
+    def export_results(self) -> int:
+        """Собирает итоговый data.xlsx из хранилища; можно вызывать и во время парсинга"""
+        if self.run_id is None:
+            return 0
+        count = self.store.export_xlsx("phone", self.data_saving, self.run_id)
+        print(f"Файл {self.data_saving} собран: {count} записей")
+        return count
 
     def get_random_user_agent(self):
         """Скрываем автоматизацию с помощью захода с разных систем"""
@@ -175,10 +393,14 @@ class HHParse:
             return
 
         # Пул создаём максимального размера; часть вкладок можем не использовать
-        pages = [await context.new_page() for _ in range(self.CONCURRENCY)]
+        pages = [await self.supervisor.new_page(context) for _ in range(self.CONCURRENCY)]
+        nav_counts = [0] * len(pages)  # Переходов на каждой вкладке с момента её создания
+        context_navs = 0  # Переходов в текущем контексте
+        pending = deque(urls)  # Очередь URL; при падении браузера незавершённые возвращаются в начало
+        retries = []  # Куча (время готовности, URL) ссылок, отложенных после таймаута
+        timeouts = Counter()  # Сколько раз ссылка упиралась в таймаут
         try:
-            it = iter(urls)  # Итератор по URL
-            while True:
+            while pending or retries:
                 # Иногда делаем партию меньше максимума, чтобы поведение было менее ровным
                 batch_size = (
                     random.randint(max(1, self.CONCURRENCY - 1), self.CONCURRENCY)
@@ -188,47 +410,141 @@ class HHParse:
                 batch_pages = pages[:batch_size]
 
                 batch = []  # Инициализация списка для текущей партии
-                for p in batch_pages:  # Цикл по страницам партии
-                    try:
-                        url = next(it)
-                    except StopIteration:
-                        return
-                    batch.append((url, p))
+                browser_lost = None  # Причина, если браузер, контекст или вкладка умерли
+                for i, p in enumerate(batch_pages):  # Цикл по страницам партии
+                    # Сначала повторы, срок которых подошёл, затем новые ссылки
+                    if retries and retries[0][0] <= time.monotonic():
+                        url = heapq.heappop(retries)[1]
+                        self.retried += 1
+                    elif pending:
+                        url = pending.popleft()
+                    else:
+                        break  # Последнюю неполную партию всё равно обрабатываем
+                    span = Span(url, attempt=timeouts[url] + 1)
+                    batch.append((url, p, span))
+                    nav_counts[i] += 1
+                    context_navs += 1
 
                     # Не открываем все вкладки синхронно — ставим паузу перед каждым goto
                     await self.human_sleep(*self.NAV_STAGGER_BETWEEN_TABS)
                     try:
-                        await p.goto(url, wait_until="domcontentloaded")
+                        with span.stage("goto"):
+                            await p.goto(url, wait_until="domcontentloaded")
                     except PWTimeoutError:
-                        print(f"Таймаут: {url}")
-                        continue
-                    
-                for url, p in batch:
+                        # На вкладке осталась предыдущая страница — данные с неё не читаем
+                        batch.pop()
+                        timeouts[url] += 1
+                        if timeouts[url] <= self.TIMEOUT_RETRIES:
+                            delay = self.RETRY_BACKOFF * 2 ** (timeouts[url] - 1)
+                            heapq.heappush(retries, (time.monotonic() + delay, url))
+                            self._trace_finish(span, OUTCOME_TIMEOUT, retry_in_s=delay)
+                            print(f"Таймаут: {url} — повтор через {delay:.0f} с")
+                        else:
+                            self.outcomes[OUTCOME_TIMEOUT] += 1
+                            self._trace_finish(span, OUTCOME_TIMEOUT)
+                            print(f"Таймаут: {url} — попытки исчерпаны")
+                            if update_callback:
+                                update_callback(f"Таймаут: {url}")
+                    except Exception as e:
+                        if is_browser_gone_error(e):
+                            browser_lost = str(e)
+                            break
+                        # Страница не открылась — не читаем с вкладки чужие данные; повторим при продолжении
+                        batch.pop()
+                        self.outcomes[OUTCOME_NAV_ERROR] += 1
+                        self._trace_finish(span, OUTCOME_NAV_ERROR, error=str(e))
+                        print(f"Ошибка перехода {url}: {e}")
+                        if update_callback:
+                            update_callback(f"Ошибка: {url}")
+
+                if not batch and browser_lost is None:
+                    # Новых ссылок нет, остались только отложенные — ждём ближайший повтор
+                    if retries and not pending:
+                        await asyncio.sleep(max(0.0, retries[0][0] - time.monotonic()))
+                    continue
+
+                finished = set()  # URL партии, обработка которых завершена
+                for url, p, span in batch:
+                    if browser_lost is not None:
+                        break
                     await self.human_sleep(*self.HUMAN["between_actions_pause"])
 
                     try:
                         # Извлекаем данные фирмы
-                        firm_data = await self.__get_firm_data_from_page(p, url)
+                        firm_data = await self.__get_firm_data_from_page(p, url, span)
+                        if firm_data[3] == "Ошибка":
+                            # Извлечение упало — не сохраняем и не отмечаем в журнале, повторим при продолжении
+                            self.outcomes[OUTCOME_ERROR] += 1
+                            self._trace_finish(span, OUTCOME_ERROR)
+                            print(f"Ошибка при обработке {url}: данные со страницы не получены")
+                            if update_callback:
+                                update_callback(f"Ошибка: {url}")
+                            finished.add(url)  # При перезапуске браузера в этом запуске не повторяем
+                            continue
                         # Сохраняем результат только если есть телефон
-                        if firm_data and firm_data[3] != "Телефон не найден":  # Индекс 4 = телефон
+                        if firm_data[3] != "Телефон не найден":  # Индекс 4 = телефон
                             self.batch_results.append(firm_data)
+                            self.outcomes[OUTCOME_SUCCESS] += 1
+                            self._trace_finish(span, OUTCOME_SUCCESS)
                             print(f"Данные фирмы: {url} -> {firm_data}")
                             if update_callback:
                                 update_callback(f"Успешно: {url}")
                         else:
+                            self.outcomes[OUTCOME_NO_CONTACTS] += 1
+                            self._trace_finish(span, OUTCOME_NO_CONTACTS)
                             print(f"Пропуск: телефон не найден для {url}")
                             if update_callback:
                                 update_callback(f"Пропущено (нет телефона): {url}")
+                        # Вакансия обработана; при ошибке не отмечаем — повторим при продолжении
+                        self.batch_done_ids.append(extract_vacancy_id(url))
+                        finished.add(url)
 
                     except Exception as e:
+                        if is_browser_gone_error(e):
+                            browser_lost = str(e)
+                            break
+                        self.outcomes[OUTCOME_ERROR] += 1
+                        self._trace_finish(span, OUTCOME_ERROR, error=str(e))
+                        finished.add(url)
                         print(f"Ошибка при обработке {url}: {e}")
                         if update_callback:
                             update_callback(f"Ошибка: {url}")
 
                 # Сохраняем все найденные данные партией (для оптимизации)
-                if len(self.batch_results) >= 5:  # Сохраняем пачками по 20
-                    await self.data_output_to_xlsx(self.batch_results)
+                # и вместе с ними фиксируем обработанные вакансии в журнале
+                if len(self.batch_results) >= 5 or len(self.batch_done_ids) >= 20:
+                    await self.data_output_to_xlsx(self.batch_results, self.batch_done_ids)
                     self.batch_results = []  # Очищаем после сохранения
+                    self.batch_done_ids = []
+
+                if browser_lost is None and not self.supervisor.is_healthy(context, pages):
+                    browser_lost = "браузер или вкладка закрыты"
+                if browser_lost is not None:
+                    # Незавершённые URL партии возвращаем в начало очереди и поднимаем браузер заново
+                    unfinished = [url for url, _, _ in batch if url not in finished]
+                    for url, _, span in batch:
+                        if url not in finished:
+                            self._trace_finish(span, "requeued", error=browser_lost)
+                    pending.extendleft(reversed(unfinished))
+                    message = f"Браузер недоступен, перезапуск; возвращено в очередь ссылок: {len(unfinished)}"
+                    print(message)
+                    if update_callback:
+                        update_callback(message)
+                    context, pages = await self.supervisor.restart(context, pages, browser_lost)
+                    nav_counts = [0] * len(pages)
+                    context_navs = 0
+                    continue
+
+                if not pending and not retries:
+                    return
+
+                # Ограничиваем рост памяти Chromium на длинных запусках
+                if self.RECYCLE_CONTEXT_AFTER and context_navs >= self.RECYCLE_CONTEXT_AFTER:
+                    context, pages = await self._rotate_context(context, pages, context_navs, update_callback)
+                    nav_counts = [0] * len(pages)
+                    context_navs = 0
+                else:
+                    await self._recycle_pages(context, pages, nav_counts, update_callback)
         finally:
             for p in pages:
                 try:
@@ -236,8 +552,93 @@ class HHParse:
                 except Exception:
                     pass
 
-    async def __get_firm_data_from_page(self, page, url: str):
-        """Извлекает данные фирмы с открытой страницы"""
+    async def _recycle_pages(self, context, pages: list, nav_counts: list[int], update_callback=None):
+        """Пересоздаёт вкладки, которые отработали RECYCLE_PAGE_AFTER переходов или раздули JS-кучу"""
+        for i, page in enumerate(pages):
+            count = nav_counts[i]
+            reason = None
+            if page.is_closed():
+                reason = "вкладка была закрыта"
+            elif count >= self.RECYCLE_PAGE_AFTER:
+                reason = f"{count} переходов"
+            elif self.RECYCLE_HEAP_MB and count and count % self.HEAP_CHECK_EVERY == 0:
+                heap = await page_js_heap(page)
+                if heap is not None and heap >= self.RECYCLE_HEAP_MB * 1_048_576:
+                    reason = f"JS-куча {format_mb(heap)}"
+            if reason is None:
+                continue
+
+            rss_before = await browser_rss(context.browser)
+            try:
+                await page.close()
+            except Exception:
+                pass
+            pages[i] = await self.supervisor.new_page(context)
+            nav_counts[i] = 0
+            self.recycle_stats["pages"] += 1
+            rss_after = await browser_rss(context.browser)
+
+            message = (
+                f"Вкладка {i + 1} пересоздана ({reason}); "
+                f"память браузера: {format_mb(rss_before)} → {format_mb(rss_after)}"
+            )
+            print(message)
+            if update_callback:
+                update_callback(message)
+
+    async def _open_work_context(self, storage_state=None):
+        """
+        Рабочий контекст с теми же параметрами, что и первый, и авторизованным состоянием.
+        Используется при пересоздании контекста и после перезапуска браузера.
+        """
+        context = await self.browser_service.new_context(
+            **self.context_options, storage_state=storage_state or self.session_state
+        )
+        if self.BLOCK_RESOURCES:
+            await self.resource_blocker.install(context)
+        self.context = context
+        return context
+
+    async def _rotate_context(self, context, pages: list, context_navs: int, update_callback=None):
+        """
+        Заменяет контекст целиком: cookies и localStorage переносятся, вкладки открываются заново.
+        Return: (новый контекст, новые вкладки)
+        """
+        browser = context.browser
+        rss_before = await browser_rss(browser)
+
+        new_context = await self._open_work_context(await context.storage_state())
+
+        for page in pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+        new_pages = [await self.supervisor.new_page(new_context) for _ in range(len(pages))]
+        self.recycle_stats["contexts"] += 1
+        rss_after = await browser_rss(browser)
+
+        message = (
+            f"Контекст браузера пересоздан после {context_navs} переходов; "
+            f"память браузера: {format_mb(rss_before)} → {format_mb(rss_after)}"
+        )
+        print(message)
+        if update_callback:
+            update_callback(message)
+        return new_context, new_pages
+
+    async def __get_firm_data_from_page(self, page, url: str, span: Span = None):
+        """
+        Извлекает данные фирмы с открытой страницы.
+        Args:
+            span: Замеры ссылки для трассы — этапы extract (evaluate) и contacts (клики и ожидание)
+        """
+        stage = span.stage if span is not None else lambda name: nullcontext()
         if url.find("?") != -1:
             url = url[url.find("hh") : url.find("?") + 1]  # Берем ссылке, начиная с hh
         else:
@@ -252,68 +653,50 @@ class HHParse:
         }
 
         try:
-            # Извлечение названия вакансии
-            vacancy_element = await page.query_selector('[data-qa="vacancy-title"]')
-            if vacancy_element:
-                vacancy_text = await vacancy_element.text_content()
-                if vacancy_text:
-                    firm_data["firm_vacancy"] = vacancy_text.strip()
-            # Извлечение названия компании
-            company_element = await page.query_selector('[data-qa="vacancy-company-name"] span')
-            if company_element:
-                company_text = await company_element.text_content()
-                if company_text:
-                    firm_data["company_name"] = " ".join(company_text.strip().split("\xa0"))
-            
+            # Все поля страницы — одним вызовом evaluate вместо цепочки query_selector/text_content
+            with stage("extract"):
+                fields = await page.evaluate(FIRM_DATA_JS, FIRM_DATA_SELECTORS)
+
+            # Кликаем только если телефона ещё нет в DOM
             try:
-                contact_btn = await page.query_selector('button[data-qa="show-employer-contacts show-employer-contacts_top-button"]')
-                if contact_btn:  # Проверка на None
-                    await contact_btn.click()
-                    await self.human_sleep(0.5, 0.8)
-                                
-                # Номер телефона и ФИО - ищем через кнопку "Связаться"
-                
-                fio_element = await page.query_selector('div[data-qa="vacancy-contacts__fio"]')
-                if fio_element:
-                    fio_text = await fio_element.text_content()
-                    if fio_text and fio_text.strip():
-                        firm_data["fio"] = fio_text.strip()
-                
-                # Ищем телефон
-                # Сначала ищем span с номером телефона
-                phone_span = await page.query_selector('span[data-qa="vacancy-contacts__phone-number"]')
-                
-                if phone_span:
-                    phone_text = await phone_span.text_content()
-                    if phone_text and phone_text.strip():
-                        # Очищаем телефон от лишних символов, оставляем только цифры и +
-                        phone_clean = re.sub(r'[^\d+]', '', phone_text.strip())
-                        firm_data["true_phone"] = phone_clean.lstrip('+')
-                else:
-                    # Если телефон не найден, возможно нужно кликнуть по блоку телефона
-                    phone_block = await page.query_selector('div[data-qa="vacancy-contacts__phone"]')
-                    if phone_block:
-                        await phone_block.click()
-                        # Ищем телефон после клика
-                        await asyncio.sleep(0.5)
-                        phone_span = await page.query_selector('span[data-qa="vacancy-contacts__phone-number"]')
-                        if phone_span:
-                            phone_text = await phone_span.text_content()
-                            if phone_text and phone_text.strip():
-                                phone_clean = re.sub(r'[^\d+]', '', phone_text.strip())
-                                firm_data["true_phone"] = phone_clean.lstrip('+')
-                                print(f"Телефон найден после клика: {firm_data['true_phone']}")
-                            else:
-                                firm_data["true_phone"] = "Телефон не найден"
-                        else:
-                            firm_data["true_phone"] = "Телефон не найден"
-                    else:
-                        firm_data["true_phone"] = "Телефон не найден"
-                
+                if not fields["phone"] and fields["hasContactButton"]:
+                    with stage("contacts"):
+                        await page.click(CONTACT_BUTTON_SELECTOR, timeout=5000)
+                        # Ждём блок контактов целиком, а не только телефон: без телефона
+                        # ожидание иначе тянулось бы до READY_TIMEOUT
+                        await wait_ready(page, CONTACTS_READY_SELECTOR, self.READY_TIMEOUT)
+                    with stage("extract"):
+                        fields = await page.evaluate(FIRM_DATA_JS, FIRM_DATA_SELECTORS)
+
+                # Телефон может быть скрыт за блоком — раскрываем его кликом
+                if not fields["phone"] and fields["hasPhoneBlock"]:
+                    with stage("contacts"):
+                        await page.click(PHONE_BLOCK_SELECTOR, timeout=5000)
+                        await wait_ready(page, PHONE_NUMBER_SELECTOR, self.READY_TIMEOUT)
+                    with stage("extract"):
+                        fields = await page.evaluate(FIRM_DATA_JS, FIRM_DATA_SELECTORS)
+                    if fields["phone"]:
+                        print(f"Телефон найден после клика: {fields['phone']}")
             except Exception as e:
+                if is_browser_gone_error(e):
+                    raise
                 print(f"Ошибка при поиске контактов: {e}")
-                    
+
+            if fields["title"]:
+                firm_data["firm_vacancy"] = fields["title"]
+            if fields["company"]:
+                firm_data["company_name"] = " ".join(fields["company"].split("\xa0"))
+            if fields["fio"]:
+                firm_data["fio"] = fields["fio"]
+            if fields["phone"]:
+                # Очищаем телефон от лишних символов, оставляем только цифры и +
+                phone_clean = re.sub(r'[^\d+]', '', fields["phone"])
+                firm_data["true_phone"] = phone_clean.lstrip('+')
+
         except Exception as e:
+            # Падение браузера обрабатывает пул: ссылка вернётся в очередь, а не сохранится с ошибкой
+            if is_browser_gone_error(e):
+                raise
             print(f"Ошибка при поиске контактов: {e}")
             firm_data["true_phone"] = f"Ошибка"
 
@@ -326,6 +709,17 @@ class HHParse:
             firm_data["fio"],
         ]
 
+    def _trace_finish(self, span: Span, outcome: str, **extra):
+        if self.trace is not None:
+            self.trace.finish(span, outcome, **extra)
+
+    def outcome_summary(self) -> str:
+        """Итоги по ссылкам за запуск одной строкой"""
+        counts = ", ".join(
+            f"{label}: {self.outcomes[outcome]}" for outcome, label in OUTCOME_LABELS.items()
+        )
+        return f"Итоги по ссылкам — {counts}; повторов после таймаута: {self.retried}"
+
     def warning_message(self):
         print("\n" + "=" * 50)
         print("EDUCATIONAL USE ONLY - NO WARRANTY PROVIDED")
@@ -334,10 +728,56 @@ class HHParse:
         print("Author not responsible for any legal consequences.")
         print("=" * 50 + "\n")
 
-    async def parse_main(self, update_callback=None):
-        """Парсинг сайта"""
-        urls = self.read_urls_from_excel_or_csv(self.INPUT_SHEET, self.URL_COLUMN)
-        urls = urls[: self.max_num_firm]
+    async def parse_main(self, update_callback=None, browser_service=None):
+        """
+        Парсинг сайта.
+        Args:
+            browser_service: Общий BrowserService с тёплым браузером; None — запустить свой на время парсинга
+        """
+        # Файл читается лениво и только до первых max_num_firm уникальных ссылок
+        urls = self.read_urls_from_excel_or_csv(
+            self.INPUT_SHEET, self.URL_COLUMN, limit=self.max_num_firm
+        )
+        if update_callback and self.input_stats["duplicates"]:
+            update_callback(f"Удалено дубликатов во входном файле: {self.input_stats['duplicates']}")
+
+        if self.HAR_MODE:
+            # Запуск с записью/воспроизведением HAR должен повторяться один в один:
+            # журнал продолжения и индекс собранных вакансий не читаются и не пополняются
+            self.journal = None
+            self.seen_index = None
+            self.run_id = self.store.start_run("phone", str(self.input_file))
+        else:
+            # Журнал прерванного запуска с тем же входным файлом: пропускаем уже обработанное
+            self.journal = RunJournal(self.input_file)
+            ids = [extract_vacancy_id(u) for u in urls]
+            pending = self.journal.pending_positions(ids)
+            if self.journal.run_id is not None and self.store.resume_run(self.journal.run_id):
+                self.run_id = self.journal.run_id
+                print(f"Продолжаем прерванный запуск: обработано {len(urls) - len(pending)} из {len(urls)}")
+                if update_callback:
+                    update_callback(f"Продолжение прерванного запуска: уже обработано {len(urls) - len(pending)} из {len(urls)}")
+            else:
+                self.run_id = self.store.start_run("phone", str(self.input_file))
+                self.journal.begin(self.run_id)
+                pending = self.journal.pending_positions(ids)  # Новый запуск проходит весь список
+            urls = [urls[pos] for pos in pending]
+
+            # Вакансии, собранные в прошлых запусках, отсеиваем до открытия страниц
+            self.seen_index = SeenIndex(ttl_days=self.SEEN_TTL_DAYS)
+            if self.SKIP_SEEN:
+                fresh_urls = [u for u in urls if extract_vacancy_id(u) not in self.seen_index]
+                if len(fresh_urls) != len(urls):
+                    print(f"Пропущено уже собранных ранее: {len(urls) - len(fresh_urls)}")
+                    if update_callback:
+                        update_callback(f"Пропущено уже собранных ранее: {len(urls) - len(fresh_urls)}")
+                    # Пропущенные тоже отмечаем в журнале, иначе запуск никогда не станет завершённым
+                    self.journal.record(
+                        extract_vacancy_id(u) for u in urls if extract_vacancy_id(u) in self.seen_index
+                    )
+                urls = fresh_urls
+        run_status = "failed"
+        self.trace = RunTrace("phone", self.run_id) if self.TRACE else None
 
         print(f"Новых ссылок к обработке: {len(urls)};")
         try:
@@ -348,29 +788,34 @@ class HHParse:
         except:
             pass
 
-        async with async_playwright() as playwright:
-            browser = await playwright.chromium.launch(
-                headless=False,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-features=IsolateOrigins,site-per-process",
-                    "--disable-web-security",
-                    "--disable-site-isolation-trials",
-                ],
-            )  # headless=True - без графического итерфейса
+        async with browser_scope(browser_service, headless=self.HEADLESS) as service:
+            browser = await service.get_browser(headless=self.HEADLESS)
+            self.browser_service = service
+            memory_monitor = await BrowserMemoryMonitor(browser).start()
+            har = service.add_har(self.HAR_PATH, self.HAR_MODE) if self.HAR_MODE else None
+            self.bg_writer = BackgroundWriter(self._write_batch).start()
+            self.context = None
+            session_ok = False  # Контекст авторизован: состояние можно сохранить
+            # Воспроизведение HAR идёт без входа; в HAR-запуске файл сессии только читается
+            replay = self.HAR_MODE == "replay"
+            keep_session = self.REUSE_SESSION and not self.HAR_MODE
             try:
                 vp_w = random.randint(1200, 1400)
                 vp_h = random.randint(760, 900)
-                context = await browser.new_context(
+                self.context_options = dict(
                     viewport={"width": vp_w, "height": vp_h},
                     user_agent=self.get_random_user_agent(),
                     locale="ru-RU",
                     timezone_id="Europe/Moscow",
                     extra_http_headers={"Cache-Control": "no-cache"},
                 )
+                session_options = self.session.context_options() if self.REUSE_SESSION and not replay else {}
+                context = self.context = await service.new_context(
+                    **self.context_options, **session_options
+                )
 
                 # Ручной логин на первой ссылке (если есть что открывать)
-                seed_url = urls[0] if urls else None
+                seed_url = urls[0] if urls and not replay else None
                 if seed_url:
 
                     page = await context.new_page()  # Создание новой страницы
@@ -392,20 +837,47 @@ class HHParse:
 
                     await self.human_sleep(0.3, 0.7)
 
-                    print("\nТвои действия:")  # Инструкция пользователю
-                    print(" • если есть капча — реши;")
-                    print(" • залогинься в HH;")
-                    print(" • оставь открытую страницу объявления.")
-
-                    # Здесь ждем подтверждения входа
-                    if self.gui_works:
+                    if session_options and await self.session.is_logged_in(page):
+                        session_ok = True
+                        print("Сохранённая сессия действительна — шаг входа пропущен")
                         if update_callback:
-                            update_callback("Ожидание подтверждения входа... Нажмите 'Вход выполнен'")
-                        await self.press_and_rel()  # Ждем нажатия кнопки в GUI
+                            update_callback("Сохранённая сессия действительна — вход не требуется")
                     else:
-                        # Старый способ для консоли
-                        loop = asyncio.get_event_loop()
-                        await loop.run_in_executor(None, input, "Готов? Нажми Enter в консоли: ")
+                        if session_options and not self.HAR_MODE and await self.session.is_logged_out(page):
+                            # Недействительный файл не должен подставляться в следующие запуски
+                            self.session.clear()
+                            print("Сохранённая сессия истекла — требуется вход")
+                        elif session_options:
+                            # Таймаут, капча или медленная загрузка: файл оставляем, вход подтвердит пользователь
+                            print("Не удалось проверить сохранённую сессию — требуется подтверждение входа")
+                        if self.HEADLESS:
+                            raise RuntimeError(
+                                "В фоновом режиме вход невозможен: нет действительной сохранённой сессии. "
+                                "Выполните один запуск с окном браузера и войдите в HH"
+                            )
+
+                        print("\nТвои действия:")  # Инструкция пользователю
+                        print(" • если есть капча — реши;")
+                        print(" • залогинься в HH;")
+                        print(" • оставь открытую страницу объявления.")
+
+                        # Здесь ждем подтверждения входа
+                        if self.gui_works:
+                            if update_callback:
+                                update_callback("Ожидание подтверждения входа... Нажмите 'Вход выполнен'")
+                            await self.press_and_rel()  # Ждем нажатия кнопки в GUI
+                        else:
+                            # Старый способ для консоли
+                            loop = asyncio.get_event_loop()
+                            await loop.run_in_executor(None, input, "Готов? Нажми Enter в консоли: ")
+
+                        session_ok = await self.session.is_logged_in(page)
+                        if keep_session and session_ok:
+                            try:
+                                await self.session.save(context)
+                                print(f"Сессия сохранена: {self.session.path}")
+                            except Exception as e:
+                                print(f"Не удалось сохранить сессию: {e}")
 
                     try:
                         await page.close()
@@ -413,14 +885,76 @@ class HHParse:
                         pass
                         # Основной список из Excel
                 try:
+                    # Перехват ставим после входа, чтобы капча и форма логина отображались полностью
+                    if self.BLOCK_RESOURCES:
+                        await self.resource_blocker.install(context)
+                    # Состояние после входа — для контекстов, которые откроются после перезапуска браузера
+                    self.session_state = await context.storage_state()
+                    self.supervisor = BrowserSupervisor(
+                        service,
+                        self._open_work_context,
+                        headless=self.HEADLESS,
+                        max_restarts=self.MAX_BROWSER_RESTARTS,
+                    )
                     await self.process_urls_with_pool(context, urls, update_callback)
-                    if self.batch_results:
-                        await self.data_output_to_xlsx(self.batch_results)
+                    run_status = "completed"
                 except Exception as e:
                     print(f"Ошибка {e}")
 
             finally:
-                await browser.close()
+                try:
+                    # Обновлённые за запуск cookies сохраняем, чтобы сессия прожила дольше
+                    if self.context is not None and keep_session and session_ok:
+                        try:
+                            await self.session.save(self.context)
+                        except Exception as e:
+                            print(f"Не удалось сохранить сессию: {e}")
+                    # Общий браузер не закрываем — только свой контекст
+                    if self.context is not None:
+                        await self.context.close()
+                except Exception:
+                    pass
+                finally:
+                    # Остаток партии пишем и при ошибке/отмене — чтобы журнал знал, где остановились
+                    if self.batch_results or self.batch_done_ids:
+                        await self.data_output_to_xlsx(self.batch_results, self.batch_done_ids)
+                        self.batch_results = []
+                        self.batch_done_ids = []
+                    # Дописываем очередь и собираем xlsx вне event loop
+                    await self.bg_writer.close()
+                    if self.seen_index is not None:
+                        self.seen_index.save()
+                    if self.journal is not None and not self.journal.finish():
+                        run_status = "interrupted" if run_status == "completed" else run_status
+                        print("Не все ссылки обработаны — при повторном запуске с тем же файлом парсинг продолжится")
+                    self.store.finish_run(self.run_id, run_status)
+                    try:
+                        await asyncio.to_thread(self.export_results)
+                    except Exception as e:
+                        print(f"Ошибка экспорта в Excel: {e}")
+                    outcome_summary = self.outcome_summary()
+                    print(outcome_summary)
+                    if update_callback:
+                        update_callback(outcome_summary)
+                    if self.BLOCK_RESOURCES:
+                        print(self.resource_blocker.summary())
+                        if update_callback:
+                            update_callback(self.resource_blocker.summary())
+                    memory_summary = await memory_monitor.stop()
+                    if any(self.recycle_stats.values()):
+                        memory_summary += (
+                            f"; пересоздано вкладок: {self.recycle_stats['pages']}, "
+                            f"контекстов: {self.recycle_stats['contexts']}"
+                        )
+                    print(memory_summary)
+                    if update_callback:
+                        update_callback(memory_summary)
+                    if har is not None:
+                        service.remove_hook(har)
+                        print(f"HAR ({self.HAR_MODE}): {self.HAR_PATH}")
+                    if self.trace is not None:
+                        self.trace.close()
+                        print(f"Трасса запуска: {self.trace.path}")
 
 
 async def main():
@@ -428,7 +962,9 @@ async def main():
         input_file="abc.xlsx",
         max_num_firm=5,  # Сколько вакансий собрать
         gui_works=False,
+        headless=False,  # True — без окна браузера (после первого входа, когда сессия сохранена)
     )
+    # parser.HAR_MODE = "record"  # Записать трафик; "replay" — повторить запуск без сети
     await parser.parse_main()
 
 
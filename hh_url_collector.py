@@ -1,41 +1,62 @@
-import os
 import re
 import asyncio
 import random
-from playwright.async_api import async_playwright
-from openpyxl import Workbook, load_workbook
+from Main_HH_files.background_writer import BackgroundWriter
+from Main_HH_files.result_store import ResultStore
+from Main_HH_files.seen_index import SeenIndex
+from Main_HH_files.resource_blocker import ResourceBlocker
+from Main_HH_files.browser_service import browser_scope
+from Main_HH_files.browser_memory import BrowserMemoryMonitor
+from Main_HH_files.page_waits import click_and_wait_page_change
+
+
+def extract_vacancy_id(url: str) -> str:
+    """Извлекает ID вакансии из URL hh.ru"""
+    match = re.search(r"vacancy/(\d+)", url or "")
+    return match.group(1) if match else None
 
 
 class HHVacancyCollector:
     """Сбор URL вакансий со страницы поиска HH.ru"""
     
-    def __init__(self, search_url: str, max_vacancies: int = 50):
+    def __init__(self, search_url: str, max_vacancies: int = 50, headless: bool = False):
         self.search_url = search_url
         self.max_vacancies = max_vacancies
         self.vacancies = []
         self.data_saving = "hh_parse_results/hh_url_search_results.xlsx"
+        self.store = ResultStore()
+        self.run_id = None
+        self.context = None
+        self.HEADLESS = headless  # Фоновый режим без окна браузера (для серверов без дисплея)
+        self.SKIP_SEEN = True  # Не собирать ссылки на вакансии, уже собранные парсерами в прошлых запусках
+        self.SEEN_TTL_DAYS = 7  # Сколько дней вакансия считается собранной; None = бессрочно
+        self.seen_index = None
+        self.BLOCK_RESOURCES = True  # Не загружать картинки, шрифты, медиа и аналитику
+        self.resource_blocker = ResourceBlocker()
         self.warning_message()
 
     def _extract_vacancy_id(self, url: str) -> str:
         """Извлекает ID вакансии из URL hh.ru"""
-        match = re.search(r"vacancy/(\d+)", url)
-        return match.group(1) if match else None
+        return extract_vacancy_id(url)
 
     async def _get_links(self):
         """Получение ссылок на вакансии с текущей страницы"""
-        # Селектор для ссылок на вакансии hh.ru
+        # Селектор для ссылок на вакансии hh.ru; все href забираем одним вызовом
         link_selector = 'a[data-qa="serp-item__title"]'
-        found_links = await self.page.query_selector_all(link_selector)
+        hrefs = await self.page.eval_on_selector_all(
+            link_selector, "(links) => links.map((a) => a.getAttribute('href'))"
+        )
 
         links = []
-        for link in found_links:
-            href = await link.get_attribute("href")
+        for href in hrefs:
             if href:
                 # Пропускаем рекламные ссылки adsrv.hh.ru
-                if "adsrv.hh.ru" in href or "adsrv.hh.ru" in href:
+                if "adsrv.hh.ru" in href:
                     continue
-                    
+
                 vacancy_id = self._extract_vacancy_id(href)
+                if self.seen_index is not None and vacancy_id in self.seen_index:
+                    continue
                 # Очищаем URL от параметров
                 clean_url = href.split("?")[0]
                 full_url = f"https://hh.ru{clean_url}" if clean_url.startswith("/") else clean_url
@@ -48,45 +69,19 @@ class HHVacancyCollector:
         try:
             next_button = await self.page.query_selector('a[data-qa="pager-next"]')
             if next_button and await next_button.is_visible():
-                await next_button.click()
-                await asyncio.sleep(random.uniform(1.5, 2.5))
-                return True
+                # Ждём новую страницу с результатами, а не фиксированные 1.5–2.5 с
+                return await click_and_wait_page_change(
+                    self.page, next_button, 'a[data-qa="serp-item__title"]'
+                )
             return False
         except Exception as e:
             print(f"Ошибка при переходе на следующую страницу: {e}")
             return False
 
-    def _create_xlsx(self):
-        """Создание XLSX файла с заголовками"""
-        os.makedirs("hh_parse_results", exist_ok=True)
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "HH Vacancies URLs"
-
-        headers = ["Ссылка на вакансию"]
-        for col, header in enumerate(headers, start=1):
-            ws.cell(row=1, column=col, value=header)
-
-        wb.save(self.data_saving)
-        print(f"Создан файл: {self.data_saving}")
-
     def _save_to_xlsx(self):
-        """Сохранение данных в XLSX файл"""
-        if not os.path.exists(self.data_saving):
-            self._create_xlsx()
-
-        wb = load_workbook(self.data_saving)
-        ws = wb.active
-
-        start_row = ws.max_row + 1 if ws.max_row > 1 else 2
-
-        for vacancy in self.vacancies:
-            ws.cell(row=start_row, column=1, value=vacancy["url"])
-            start_row += 1
-
-        wb.save(self.data_saving)
-        print(f"Данные сохранены в файл: {self.data_saving}")
+        """Выгрузка ссылок текущего запуска из хранилища в XLSX файл"""
+        count = self.store.export_xlsx("urls", self.data_saving, self.run_id)
+        print(f"Данные сохранены в файл: {self.data_saving} ({count} ссылок)")
 
     def warning_message(self):
         print("\n" + "=" * 50)
@@ -96,78 +91,113 @@ class HHVacancyCollector:
         print("Author not responsible for any legal consequences.")
         print("=" * 50 + "\n")
 
-    async def parse_main(self, update_callback=None):
-        """Сбор вакансий со страницы поиска"""
-        self._create_xlsx()
+    async def parse_main(self, update_callback=None, browser_service=None):
+        """
+        Сбор вакансий со страницы поиска.
+        Args:
+            browser_service: Общий BrowserService с тёплым браузером; None — запустить свой на время сбора
+        """
+        self.run_id = self.store.start_run("urls", self.search_url)
+        self.seen_index = SeenIndex(ttl_days=self.SEEN_TTL_DAYS) if self.SKIP_SEEN else None
 
         if update_callback:
             update_callback("Начало сбора вакансий...")
 
-        async with async_playwright() as playwright:
-            browser = await playwright.chromium.launch(headless=False)
-            self.context = await browser.new_context()
-            self.page = await self.context.new_page()
-
-            await self.page.goto(
-                self.search_url,
-                wait_until="domcontentloaded",
-            )
+        # Ссылки пишутся в хранилище в отдельном потоке, пока собирается следующая страница
+        bg_writer = BackgroundWriter(lambda links: self.store.add_urls(self.run_id, links))
+        try:
+            await self._collect(bg_writer, update_callback, browser_service)
+        except BaseException:
+            self.store.finish_run(self.run_id, "failed")
+            raise
+        finally:
+            # Общий браузер остаётся открытым — закрываем только свой контекст
+            if self.context is not None:
+                try:
+                    await self.context.close()
+                except Exception:
+                    pass
+        self.store.finish_run(self.run_id, "completed")
+        return self.vacancies
 
-            # Ждем появления результатов поиска
+    async def _collect(self, bg_writer, update_callback=None, browser_service=None):
+        """Обход страниц поиска (запись идёт через bg_writer)"""
+        async with bg_writer, browser_scope(browser_service, headless=self.HEADLESS) as service:
+            browser = await service.get_browser(headless=self.HEADLESS)
+            memory_monitor = await BrowserMemoryMonitor(browser).start()
             try:
-                await self.page.wait_for_selector(
-                    'a[data-qa="serp-item__title"]',
-                    timeout=30000
-                )
+                await self._collect_pages(service, bg_writer, update_callback)
+            finally:
+                memory_summary = await memory_monitor.stop()
+                print(memory_summary)
                 if update_callback:
-                    update_callback("Страница поиска загружена")
-            except Exception as e:
-                print(f"Ошибка: не удалось загрузить результаты поиска: {e}")
-                if update_callback:
-                    update_callback(f"Ошибка загрузки страницы: {e}")
-                await browser.close()
-                return
+                    update_callback(memory_summary)
 
-            # Собираем ссылки с нескольких страниц
-            while len(self.vacancies) < self.max_vacancies:
-                page_links = await self._get_links()
+    async def _collect_pages(self, service, bg_writer, update_callback=None):
+        """Переход по страницам выдачи и сбор ссылок"""
+        self.context = await service.new_context()
+        if self.BLOCK_RESOURCES:
+            await self.resource_blocker.install(self.context)
+        self.page = await self.context.new_page()
 
-                for link in page_links:
-                    if len(self.vacancies) < self.max_vacancies:
-                        self.vacancies.append(link)
-                        await asyncio.sleep(0.1)
+        await self.page.goto(
+            self.search_url,
+            wait_until="domcontentloaded",
+        )
 
-                print(f"Всего собрано ссылок: {len(self.vacancies)} из {self.max_vacancies}")
-                if update_callback:
-                    update_callback(f"Найдено вакансий: {len(self.vacancies)} из {self.max_vacancies}")
+        # Ждем появления результатов поиска
+        try:
+            await self.page.wait_for_selector(
+                'a[data-qa="serp-item__title"]',
+                timeout=30000
+            )
+            if update_callback:
+                update_callback("Страница поиска загружена")
+        except Exception as e:
+            print(f"Ошибка: не удалось загрузить результаты поиска: {e}")
+            if update_callback:
+                update_callback(f"Ошибка загрузки страницы: {e}")
+            return
 
-                if len(self.vacancies) >= self.max_vacancies:
-                    if update_callback:
-                        update_callback(f"Достигнуто необходимое количество вакансий: {self.max_vacancies}")
-                    break
+        # Собираем ссылки с нескольких страниц
+        while len(self.vacancies) < self.max_vacancies:
+            page_links = await self._get_links()
 
-                if not await self._go_to_next_page():
-                    if update_callback:
-                        update_callback("Больше нет страниц для парсинга")
-                    break
+            new_links = page_links[: self.max_vacancies - len(self.vacancies)]
+            self.vacancies.extend(new_links)
+            await bg_writer.submit(new_links)
 
-                await asyncio.sleep(random.uniform(1.5, 2.5))
+            print(f"Всего собрано ссылок: {len(self.vacancies)} из {self.max_vacancies}")
+            if update_callback:
+                update_callback(f"Найдено вакансий: {len(self.vacancies)} из {self.max_vacancies}")
 
-            self._save_to_xlsx()
+            if len(self.vacancies) >= self.max_vacancies:
+                if update_callback:
+                    update_callback(f"Достигнуто необходимое количество вакансий: {self.max_vacancies}")
+                break
 
-            print(f"Количество уникальных вакансий: {len(self.vacancies)}")
-            if update_callback:
-                update_callback(f"Сбор завершен. Найдено вакансий: {len(self.vacancies)}")
+            if not await self._go_to_next_page():
+                if update_callback:
+                    update_callback("Больше нет страниц для парсинга")
+                break
 
-            await browser.close()
+            await asyncio.sleep(random.uniform(1.5, 2.5))
 
-        return self.vacancies
+        await bg_writer.flush()
+        await asyncio.to_thread(self._save_to_xlsx)
+
+        print(f"Количество уникальных вакансий: {len(self.vacancies)}")
+        if update_callback:
+            update_callback(f"Сбор завершен. Найдено вакансий: {len(self.vacancies)}")
+        if self.BLOCK_RESOURCES:
+            print(self.resource_blocker.summary())
 
 
 async def main():
     collector = HHVacancyCollector(
         search_url="https://saratov.hh.ru/search/vacancy?area=1234",
-        max_vacancies=20
+        max_vacancies=20,
+        headless=False,  # True — без окна браузера
     )
     await collector.collect()
 